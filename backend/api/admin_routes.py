@@ -1,19 +1,33 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy import select, func
+from sqlalchemy import select, func, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from pydantic import BaseModel
 
-from models.database import AsyncSessionLocal, UserDB, UserRole, GameRequestDB
+from models.database import get_async_db, UserDB, UserRole, GameRequestDB
 from models.user_models import UserRead, UserCreate, UserUpdate
-from services.auth_deps import get_current_admin
+from services.auth_deps import get_current_admin, invalidate_cached_user
 from services.auth_service import AuthService
 from services.logging_service import app_logger
+from services.request_service import RequestService
+from services.setup_service import SetupService
 
 router = APIRouter()
 
 class PasswordResetRequest(BaseModel):
     new_password: str
 
+# Only the columns needed for UserRead (skips hashed_password etc.)
+USER_READ_COLUMNS = (
+    UserDB.id,
+    UserDB.username,
+    UserDB.role,
+    UserDB.is_active,
+    UserDB.is_superuser,
+    UserDB.is_verified,
+    UserDB.created_at,
+)
+
 @router.post("/users", response_model=UserRead)
 async def create_user_admin(
     user_data: UserCreate,
@@ -35,7 +49,7 @@ async def create_user_admin(
             f"Created user '{user_data.username}' with role {user_data.role.value}"
         )
         
-        return UserRead.model_validate(new_user)
+        return UserRead.from_row(new_user)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -43,151 +57,165 @@ async def create_user_admin(
 
 @router.get("/users", response_model=List[UserRead])
 async def get_all_users(
-    admin_user: UserDB = Depends(get_current_admin)
+    admin_user: UserDB = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Admin: Get all users"""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(UserDB))
-        users = result.scalars().all()
-        return [UserRead.model_validate(user) for user in users]
+    result = await session.execute(select(*USER_READ_COLUMNS))
+    return [UserRead.from_row(row) for row in result]
+
+@router.get("/users/request-counts")
+async def get_user_request_counts(
+    admin_user: UserDB = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_async_db)
+):
+    """Admin: Get request counts for all users"""
+    # Count per requester without joining the users table
+    users_result = await session.execute(select(UserDB.id))
+    counts_result = await session.execute(
+        select(GameRequestDB.requester_id, func.count(GameRequestDB.id))
+        .group_by(GameRequestDB.requester_id)
+    )
+    
+    counts = {requester_id: count for requester_id, count in counts_result}
+    return {user_id: counts.get(user_id, 0) for (user_id,) in users_result}
 
 @router.get("/users/{user_id}", response_model=UserRead)
 async def get_user_by_id(
     user_id: int,
-    admin_user: UserDB = Depends(get_current_admin)
+    admin_user: UserDB = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Admin: Get specific user by ID"""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(UserDB).where(UserDB.id == user_id))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        return UserRead.model_validate(user)
+    result = await session.execute(select(*USER_READ_COLUMNS).where(UserDB.id == user_id))
+    user = result.one_or_none()
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return UserRead.from_row(user)
 
 @router.put("/users/{user_id}/role")
 async def update_user_role(
     user_id: int,
     new_role: UserRole,
-    admin_user: UserDB = Depends(get_current_admin)
+    admin_user: UserDB = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Admin: Update user role"""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(UserDB).where(UserDB.id == user_id))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user.role = new_role
-        user.is_superuser = new_role == UserRole.ADMIN
-        await session.commit()
-        return {"message": f"User role updated to {new_role}"}
+    result = await session.execute(
+        update(UserDB)
+        .where(UserDB.id == user_id)
+        .values(role=new_role, is_superuser=new_role == UserRole.ADMIN)
+    )
+    
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    await session.commit()
+    invalidate_cached_user(user_id)
+    if new_role != UserRole.ADMIN:
+        # The last admin may have been demoted
+        SetupService.invalidate_setup_status()
+    return {"message": f"User role updated to {new_role}"}
 
 @router.put("/users/{user_id}/active")
 async def toggle_user_active(
     user_id: int,
     is_active: bool,
-    admin_user: UserDB = Depends(get_current_admin)
+    admin_user: UserDB = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Admin: Activate/Deactivate user"""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(UserDB).where(UserDB.id == user_id))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user.is_active = is_active
-        await session.commit()
-        return {"message": f"User {'activated' if is_active else 'deactivated'}"}
+    result = await session.execute(
+        update(UserDB).where(UserDB.id == user_id).values(is_active=is_active)
+    )
+    
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    await session.commit()
+    invalidate_cached_user(user_id)
+    return {"message": f"User {'activated' if is_active else 'deactivated'}"}
 
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: int,
     force: bool = Query(False),
-    admin_user: UserDB = Depends(get_current_admin)
+    admin_user: UserDB = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Admin: Delete user"""
     if user_id == admin_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
-    async with AsyncSessionLocal() as session:
-        # Check if user exists
-        result = await session.execute(select(UserDB).where(UserDB.id == user_id))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Check if user has any game requests
-        requests_result = await session.execute(
-            select(GameRequestDB).where(GameRequestDB.requester_id == user_id)
+    # Check if user exists
+    result = await session.execute(select(UserDB).where(UserDB.id == user_id))
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # Count the user's game requests without loading them
+    count_result = await session.execute(
+        select(func.count(GameRequestDB.id)).where(GameRequestDB.requester_id == user_id)
+    )
+    request_count = count_result.scalar() or 0
+    
+    if request_count and not force:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Cannot delete user '{user.username}'. User has {request_count} game request(s). Please delete or reassign the requests first."
         )
-        user_requests = requests_result.scalars().all()
-        
-        if user_requests and not force:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Cannot delete user '{user.username}'. User has {len(user_requests)} game request(s). Please delete or reassign the requests first."
-            )
-        
-        # If force=True, delete all user's requests first
-        if user_requests and force:
-            for request in user_requests:
-                await session.delete(request)
-        
-        await session.delete(user)
-        await session.commit()
-        
-        message = "User deleted"
-        if user_requests and force:
-            message += f" (along with {len(user_requests)} game request(s))"
-        
-        return {"message": message}
-
-@router.get("/users/request-counts")
-async def get_user_request_counts(
-    admin_user: UserDB = Depends(get_current_admin)
-):
-    """Admin: Get request counts for all users"""
-    async with AsyncSessionLocal() as session:
-        # Get all users with their request counts
-        result = await session.execute(
-            select(UserDB.id, UserDB.username, func.count(GameRequestDB.id).label('request_count'))
-            .outerjoin(GameRequestDB, UserDB.id == GameRequestDB.requester_id)
-            .group_by(UserDB.id, UserDB.username)
+    
+    # If force=True, delete all user's requests in a single statement
+    deleted_igdb_ids = []
+    if request_count and force:
+        deleted = await session.execute(
+            delete(GameRequestDB)
+            .where(GameRequestDB.requester_id == user_id)
+            .returning(GameRequestDB.igdb_id)
+            .execution_options(synchronize_session=False)
         )
-        
-        user_counts = {}
-        for row in result:
-            user_counts[row.id] = row.request_count
-            
-        return user_counts
+        deleted_igdb_ids = deleted.scalars().all()
+    
+    await session.delete(user)
+    await session.commit()
+    invalidate_cached_user(user_id)
+    await RequestService.invalidate_game_status_cache(*deleted_igdb_ids)
+    
+    message = "User deleted"
+    if request_count and force:
+        message += f" (along with {request_count} game request(s))"
+    
+    return {"message": message}
 
 @router.put("/users/{user_id}/password")
 async def reset_user_password(
     user_id: int,
     password_data: PasswordResetRequest,
-    admin_user: UserDB = Depends(get_current_admin)
+    admin_user: UserDB = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Admin: Reset user password"""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(UserDB).where(UserDB.id == user_id))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Validate password requirements
-        try:
-            AuthService.validate_password(password_data.new_password)
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-        
-        # Update password using AuthService
-        user.hashed_password = AuthService.get_password_hash(password_data.new_password)
-        await session.commit()
-        
-        return {"message": "Password updated successfully"}
+    # Validate password requirements
+    try:
+        AuthService.validate_password(password_data.new_password)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Update password using AuthService
+    hashed_password = await AuthService.get_password_hash_async(password_data.new_password)
+    result = await session.execute(
+        update(UserDB)
+        .where(UserDB.id == user_id)
+        .values(hashed_password=hashed_password)
+    )
+    
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    await session.commit()
+    invalidate_cached_user(user_id)
+    
+    return {"message": "Password updated successfully"}
@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from models.user_models import LoginRequest, LoginResponse, UserRead, Token, ProfileUpdateRequest, PasswordChangeRequest
 from services.auth_service import AuthService
-from services.auth_deps import get_current_user
+from services.auth_deps import get_current_user, invalidate_cached_user
 from models.database import UserDB
 from sqlalchemy import select, func
 from models.database import AsyncSessionLocal, GameRequestDB
@@ -25,7 +25,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     access_token = AuthService.create_access_token(data={"sub": str(user.id)})
     
     # Convert user to UserRead
-    user_read = UserRead.model_validate(user)
+    user_read = UserRead.from_row(user)
     
     return LoginResponse(
         access_token=access_token,
@@ -49,7 +49,7 @@ async def login_json(login_data: LoginRequest):
     access_token = AuthService.create_access_token(data={"sub": str(user.id)})
     
     # Convert user to UserRead
-    user_read = UserRead.model_validate(user)
+    user_read = UserRead.from_row(user)
     
     return LoginResponse(
         access_token=access_token,
@@ -60,25 +60,35 @@ async def login_json(login_data: LoginRequest):
 @router.get("/me", response_model=UserRead)
 async def read_me(current_user: UserDB = Depends(get_current_user)):
     """Get current user"""
-    return UserRead.model_validate(current_user)
+    return UserRead.from_row(current_user)
 
 @router.get("/account-info")
 async def get_account_info(current_user: UserDB = Depends(get_current_user)):
     """Get detailed account information"""
     async with AsyncSessionLocal() as session:
-        # Get request count
-        request_count_result = await session.execute(
-            select(func.count(GameRequestDB.id)).where(GameRequestDB.requester_id == current_user.id)
+        # Get account fields and request count in one round trip
+        request_count_subquery = (
+            select(func.count(GameRequestDB.id))
+            .where(GameRequestDB.requester_id == UserDB.id)
+            .scalar_subquery()
         )
-        request_count = request_count_result.scalar()
+        result = await session.execute(
+            select(
+                UserDB.created_at,
+                UserDB.last_login,
+                UserDB.is_active,
+                request_count_subquery.label("request_count")
+            ).where(UserDB.id == current_user.id)
+        )
+        account = result.one()
         
-        last_login_display = current_user.last_login.strftime("%B %d, %Y %H:%M") if current_user.last_login else "Never"
+        last_login_display = account.last_login.strftime("%B %d, %Y %H:%M") if account.last_login else "Never"
 
         return {
-            "member_since": current_user.created_at.strftime("%B %d, %Y"),
+            "member_since": account.created_at.strftime("%B %d, %Y"),
             "last_login": last_login_display,
-            "total_requests": request_count,
-            "account_status": "Active" if current_user.is_active else "Inactive"
+            "total_requests": account.request_count,
+            "account_status": "Active" if account.is_active else "Inactive"
         }
 
 @router.post("/logout")
@@ -98,7 +108,8 @@ async def update_profile(
             current_user.id,
             profile_data.username
         )
-        return UserRead.model_validate(updated_user)
+        invalidate_cached_user(current_user.id)
+        return UserRead.from_row(updated_user)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -122,6 +133,7 @@ async def change_password(
             password_data.current_password,
             password_data.new_password
         )
+        invalidate_cached_user(current_user.id)
         return {"message": "Password changed successfully"}
     except ValueError as e:
         raise HTTPException(
@@ -1,11 +1,15 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from services.redis_client import get_redis
 
 router = APIRouter()
 
 @router.get("/_cache_keys")
-async def cache_keys():
+async def cache_keys(limit: int = Query(1000, ge=1, le=10000)):
     client = await get_redis()
-    # ACHTUNG: KEYS kann blockieren, wenn Du Millionen von Keys hast.
-    keys = await client.keys("*")
-    return {"keys": keys}
\ No newline at end of file
+    # SCAN iterates incrementally instead of blocking Redis like KEYS does
+    keys = []
+    async for key in client.scan_iter(match="*", count=500):
+        keys.append(key)
+        if len(keys) >= limit:
+            break
+    return {"keys": keys}
@@ -1,13 +1,17 @@
-import json
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from typing import List, Dict, Any, Optional
 
 import httpx
 
 from models.igdb_models import GameBasicInfo
 from services.igdb_client import igdb_client
-from services.redis_client import get_redis
-from services.popularity_service import refresh_popular_by_type, refresh_genre_list, refresh_popular_recent, refresh_custom_top100
+from services.popularity_service import (
+    get_cached_game_list_json,
+    refresh_popular_by_type,
+    refresh_genre_list,
+    refresh_popular_recent,
+    refresh_custom_top100,
+)
 
 router = APIRouter()
 
@@ -48,12 +52,10 @@ async def get_game_detail_route(game_id: int):
 async def get_popular_recent_route(
     limit: int = Query(20, ge=1, le=100, description="Max number of games to return")
 ):
-    redis = await get_redis()
     cache_key = "popular_recent"
 
-    if (blob := await redis.get(cache_key)):
-        games = json.loads(blob)
-        return games[:limit]
+    if (blob := await get_cached_game_list_json(cache_key, limit)):
+        return Response(content=blob, media_type="application/json")
 
     try:
         return await refresh_popular_recent(limit=limit)
@@ -69,12 +71,10 @@ async def get_popular_recent_route(
 async def get_top100_custom_route(
     limit: int = Query(20, ge=1, le=100, description="Max number of games (1–100)")
 ):
-    redis = await get_redis()
     cache_key = "custom_top100"
 
-    if (blob := await redis.get(cache_key)):
-        games = json.loads(blob)
-        return games[:limit]
+    if (blob := await get_cached_game_list_json(cache_key, limit)):
+        return Response(content=blob, media_type="application/json")
 
     try:
         return await refresh_custom_top100(limit=limit)
@@ -87,12 +87,10 @@ async def get_popular_by_type(
     pop_type: int = Query(5,  ge=1,  description="Popularity type ID")
 ):
     """Popular games by a specific popularity type (e.g., 24h peak = type 5)"""
-    redis     = await get_redis()
     cache_key = f"popular_by_type:{pop_type}"
 
-    if (blob := await redis.get(cache_key)):
-        games = json.loads(blob)
-        return games[:limit]
+    if (blob := await get_cached_game_list_json(cache_key, limit)):
+        return Response(content=blob, media_type="application/json")
 
     try:
         return await refresh_popular_by_type(pop_type=pop_type, limit=limit)
@@ -8,10 +8,11 @@ from datetime import datetime
 from models.database import get_async_db, GameRequestDB, RequestStatus
 from models.user_models import UserRead
 from services.auth_deps import get_current_user
-from services.igdb_client import igdb_client
+from services.igdb_client import igdb_client, IGDB_MAX_CONCURRENT_REQUESTS
 from services.logging_service import app_logger
+from services.request_service import RequestService
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, func
 
 router = APIRouter()
 
@@ -25,78 +26,89 @@ class ImportResult(BaseModel):
     imported_games: List[Dict[str, Any]]
     failed_games: List[Dict[str, str]]
 
+IGDB_COVER_BIG_PREFIX = "https://images.igdb.com/igdb/image/upload/t_cover_big/"
+IGDB_COVER_SMALL_PREFIX = "https://images.igdb.com/igdb/image/upload/t_cover_small/"
+IMPORT_COMMENT = "Imported from library"
+IMPORT_ADMIN_NOTES = "Automatically imported from library"
+
+# Patterns for clean_game_name, compiled once
+BRACKETS_PATTERN = re.compile(r'\s*\(.*?\)\s*')
+COLON_SUFFIX_PATTERN = re.compile(r'\s*:.*$')
+DASH_SUFFIX_PATTERN = re.compile(r'\s*-.*$')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
 def clean_game_name(name: str) -> str:
     """
     Cleans game names of common suffixes that could interfere with the search.
     """
     # Remove common suffixes
-    name = re.sub(r'\s*\(.*?\)\s*', '', name)  # Remove brackets
-    name = re.sub(r'\s*:.*$', '', name)  # Remove everything after ":"
-    name = re.sub(r'\s*-.*$', '', name)  # Remove everything after "-"
-    name = re.sub(r'\s+', ' ', name)  # Multiple spaces to one
+    name = BRACKETS_PATTERN.sub('', name)  # Remove brackets
+    name = COLON_SUFFIX_PATTERN.sub('', name)  # Remove everything after ":"
+    name = DASH_SUFFIX_PATTERN.sub('', name)  # Remove everything after "-"
+    name = WHITESPACE_PATTERN.sub(' ', name)  # Multiple spaces to one
     return name.strip()
 
 async def find_best_match_for_game(game_name: str) -> Optional[Dict[str, Any]]:
     """
     Finds the best match for a game name.
-    Tries first the original name, then cleaned name.
+    Searches the original and the cleaned name in a single IGDB multiquery
+    and prefers results for the original name.
     """
     try:
-        # First search with original name
-        results = await igdb_client.search_games(search_term=game_name, limit=5)
+        cleaned_name = clean_game_name(game_name)
         
-        if results:
+        if cleaned_name == game_name or len(cleaned_name) < 2:
+            results = await igdb_client.search_games(search_term=game_name, limit=5)
             # Take the first result as the best match
-            return results[0]
+            return results[0] if results else None
         
-        # Wenn keine Ergebnisse, probiere bereinigten Namen
-        cleaned_name = clean_game_name(game_name)
-        if cleaned_name != game_name and len(cleaned_name) >= 2:
-            app_logger.info(f"Trying cleaned name '{cleaned_name}' for '{game_name}'", action="IMPORT_RETRY")
-            results = await igdb_client.search_games(search_term=cleaned_name, limit=5)
-            
-            if results:
-                return results[0]
+        original_results, cleaned_results = await igdb_client.search_games_multi(
+            [game_name, cleaned_name], limit=5
+        )
+        
+        if original_results:
+            return original_results[0]
+        
+        if cleaned_results:
+            app_logger.info(f"Matched cleaned name '{cleaned_name}' for '{game_name}'", action="IMPORT_RETRY")
+            return cleaned_results[0]
         
         return None
         
     except Exception as e:
+        # Transport/API errors are not a "no match"; let the caller report them as errors
         app_logger.error(f"Error searching for game '{game_name}': {str(e)}", action="IMPORT_SEARCH_ERROR")
-        return None
+        raise
 
-async def create_completed_request(
+def build_completed_request_values(
     game_data: Dict[str, Any], 
     original_name: str,
     user: UserRead,
-    db: AsyncSession
-) -> GameRequestDB:
+    now: datetime
+) -> Dict[str, Any]:
     """
-    Creates a completed request for an imported game.
+    Builds the column values of a completed request for an imported game.
     """
     # Create cover URL if available
-    cover_url = None
-    if game_data.get("cover") and game_data["cover"].get("image_id"):
-        cover_url = f"https://images.igdb.com/igdb/image/upload/t_cover_big/{game_data['cover']['image_id']}.jpg"
+    image_id = (game_data.get("cover") or {}).get("image_id")
+    cover_url = IGDB_COVER_BIG_PREFIX + image_id + ".jpg" if image_id else None
     
     # Summarize genres
-    genres = ", ".join(game_data.get("genre_names", [])) if game_data.get("genre_names") else None
-    
-    # Create request
-    request = GameRequestDB(
-        game_name=game_data["name"],
-        igdb_id=game_data["id"],
-        igdb_cover_url=cover_url,
-        igdb_genres=genres,
-        comment=f"Imported from library. Original name: '{original_name}'" if original_name != game_data["name"] else "Imported from library",
-        status=RequestStatus.COMPLETED,
-        admin_notes="Automatically imported from library",
-        requester_id=user.id,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
-    )
+    genre_names = game_data.get("genre_names")
+    genres = ", ".join(genre_names) if genre_names else None
     
-    db.add(request)
-    return request
+    return {
+        "game_name": game_data["name"],
+        "igdb_id": game_data["id"],
+        "igdb_cover_url": cover_url,
+        "igdb_genres": genres,
+        "comment": f"{IMPORT_COMMENT}. Original name: '{original_name}'" if original_name != game_data["name"] else IMPORT_COMMENT,
+        "status": RequestStatus.COMPLETED,
+        "admin_notes": IMPORT_ADMIN_NOTES,
+        "requester_id": user.id,
+        "created_at": now,
+        "updated_at": now
+    }
 
 @router.post("/text", response_model=ImportResult)
 async def import_games_from_text(
@@ -114,8 +126,8 @@ async def import_games_from_text(
     app_logger.info(f"Starting text import for {len(import_data.games)} games", 
                    action="IMPORT_START", user_id=current_user.id)
     
-    # Clean and validate input
-    game_names = [name.strip() for name in import_data.games if name.strip()]
+    # Clean and validate input (duplicate names are only looked up once)
+    game_names = list(dict.fromkeys(name.strip() for name in import_data.games if name.strip()))
     
     if not game_names:
         raise HTTPException(status_code=400, detail="No valid game names provided")
@@ -127,9 +139,9 @@ async def import_games_from_text(
     existing_games = await db.execute(
         select(GameRequestDB.game_name).where(
             GameRequestDB.game_name.in_(game_names)
-        )
+        ).distinct()
     )
-    existing_names = {name for (name,) in existing_games.fetchall()}
+    existing_names = frozenset(existing_games.scalars().all())
     
     # Filter out already existing games
     new_game_names = [name for name in game_names if name not in existing_names]
@@ -139,61 +151,83 @@ async def import_games_from_text(
     
     successful_imports = []
     failed_imports = []
+    matched_games = []
     
     # Batch-Verarbeitung mit Concurrency-Limit
-    semaphore = asyncio.Semaphore(5)  # Maximum 5 concurrent API calls
+    semaphore = asyncio.Semaphore(IGDB_MAX_CONCURRENT_REQUESTS)  # IGDB allows 8 open requests
     
     async def process_game(game_name: str):
-        async with semaphore:
-            try:
-                # Find the best match
-                game_data = await find_best_match_for_game(game_name)
-                
-                if not game_data:
-                    failed_imports.append({
-                        "name": game_name,
-                        "reason": "No matching game found in IGDB"
-                    })
-                    return
-                
-                # Check if this IGDB game already exists
-                existing_request = await db.execute(
-                    select(GameRequestDB).where(GameRequestDB.igdb_id == game_data["id"])
-                )
-                if existing_request.fetchone():
-                    failed_imports.append({
-                        "name": game_name,
-                        "reason": f"Game '{game_data['name']}' already exists in system"
-                    })
-                    return
-                
-                # Create completed request
-                request = await create_completed_request(game_data, game_name, current_user, db)
-                
-                successful_imports.append({
-                    "original_name": game_name,
-                    "igdb_name": game_data["name"],
-                    "igdb_id": game_data["id"],
-                    "cover_url": request.igdb_cover_url,
-                    "genres": request.igdb_genres
-                })
-                
-                app_logger.info(f"Successfully imported '{game_name}' as '{game_data['name']}'", 
-                               action="IMPORT_SUCCESS")
-                
-            except Exception as e:
+        try:
+            # Find the best match
+            game_data = await find_best_match_for_game(game_name)
+            
+            if not game_data:
                 failed_imports.append({
                     "name": game_name,
-                    "reason": f"Error during import: {str(e)}"
+                    "reason": "No matching game found in IGDB"
                 })
-                app_logger.error(f"Failed to import '{game_name}': {str(e)}", action="IMPORT_ERROR")
+                return
+            
+            matched_games.append((game_name, game_data))
+            
+        except Exception as e:
+            failed_imports.append({
+                "name": game_name,
+                "reason": f"Error during import: {str(e)}"
+            })
+            app_logger.error(f"Failed to import '{game_name}': {str(e)}", action="IMPORT_ERROR")
+    
+    # Resolve all games in parallel (IGDB only, no database access).
+    # Tasks are only created once a slot is free, so no more than the IGDB limit exist at a time.
+    async with asyncio.TaskGroup() as task_group:
+        for name in new_game_names:
+            await semaphore.acquire()
+            task = task_group.create_task(process_game(name))
+            task.add_done_callback(lambda _: semaphore.release())
+    
+    # Check all matched IGDB games against the system in one query
+    existing_igdb_ids = set()
+    if matched_games:
+        existing_result = await db.execute(
+            select(GameRequestDB.igdb_id).where(
+                GameRequestDB.igdb_id.in_({game_data["id"] for _, game_data in matched_games})
+            ).distinct()
+        )
+        existing_igdb_ids = set(existing_result.scalars().all())
     
-    # Execute all imports in parallel
-    await asyncio.gather(*[process_game(name) for name in new_game_names])
+    rows = []
+    now = datetime.utcnow()  # All rows of one import share a timestamp
+    for game_name, game_data in matched_games:
+        if game_data["id"] in existing_igdb_ids:
+            failed_imports.append({
+                "name": game_name,
+                "reason": f"Game '{game_data['name']}' already exists in system"
+            })
+            continue
+        
+        # Also catches several names resolving to the same IGDB game
+        existing_igdb_ids.add(game_data["id"])
+        
+        values = build_completed_request_values(game_data, game_name, current_user, now)
+        rows.append(values)
+        
+        successful_imports.append({
+            "original_name": game_name,
+            "igdb_name": game_data["name"],
+            "igdb_id": game_data["id"],
+            "cover_url": values["igdb_cover_url"],
+            "genres": values["igdb_genres"]
+        })
+        
+        app_logger.info(f"Successfully imported '{game_name}' as '{game_data['name']}'", 
+                       action="IMPORT_SUCCESS")
     
-    # Save all changes
+    # Save all new requests with a single bulk INSERT
     try:
+        if rows:
+            await db.execute(insert(GameRequestDB), rows)
         await db.commit()
+        await RequestService.invalidate_game_status_cache(*(row["igdb_id"] for row in rows))
         app_logger.info(f"Import completed: {len(successful_imports)} successful, {len(failed_imports)} failed", 
                        action="IMPORT_COMPLETE", user_id=current_user.id)
     except Exception as e:
@@ -239,14 +273,12 @@ async def get_game_suggestions(
         suggestions = []
         for game in results:
             # Cover URL erstellen falls vorhanden
-            cover_url = None
-            if game.get("cover") and game["cover"].get("image_id"):
-                cover_url = f"https://images.igdb.com/igdb/image/upload/t_cover_small/{game['cover']['image_id']}.jpg"
+            image_id = (game.get("cover") or {}).get("image_id")
+            cover_url = IGDB_COVER_SMALL_PREFIX + image_id + ".jpg" if image_id else None
             
             # Release year extrahieren
             release_year = None
             if game.get("first_release_date"):
-                from datetime import datetime
                 release_year = datetime.fromtimestamp(game["first_release_date"]).year
             
             suggestions.append({
@@ -281,14 +313,14 @@ async def get_import_status(
     
     # Count imported games (completed requests with "Imported" in admin_notes)
     result = await db.execute(
-        select(GameRequestDB).where(
+        select(func.count(GameRequestDB.id), func.max(GameRequestDB.updated_at)).where(
             GameRequestDB.status == RequestStatus.COMPLETED,
             GameRequestDB.admin_notes.like("%imported%")
         )
     )
-    imported_requests = result.fetchall()
+    total_imported, last_import = result.one()
     
     return {
-        "total_imported_games": len(imported_requests),
-        "last_import": max([req[0].updated_at for req in imported_requests]) if imported_requests else None
+        "total_imported_games": total_imported,
+        "last_import": last_import
     }
@@ -4,9 +4,10 @@ Logging API Routes
 Provides endpoints for log management and viewing.
 """
 from fastapi import APIRouter, Depends, HTTPException, Response
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import List, Optional
 from datetime import datetime
+import asyncio
 import os
 from pathlib import Path
 
@@ -16,6 +17,21 @@ from models.database import UserDB
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
+LOG_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+def _iter_file_snapshot(file, size: int):
+    """Yield at most `size` bytes of an open file in chunks and close it afterwards"""
+    try:
+        remaining = size
+        while remaining > 0:
+            chunk = file.read(min(LOG_DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
 @router.get("/recent")
 async def get_recent_logs(
     lines: int = 100,
@@ -26,7 +42,8 @@ async def get_recent_logs(
     Only accessible by admin users
     """
     try:
-        logs = app_logger.get_recent_logs(lines)
+        # File reads happen in a worker thread to keep the event loop free
+        logs = await asyncio.to_thread(app_logger.get_recent_logs, lines)
         return logs
     except Exception as e:
         app_logger.error(f"Failed to fetch recent logs: {str(e)}", user_id=current_user.id)
@@ -48,14 +65,23 @@ async def download_log_file(
         
         app_logger.audit("LOG_DOWNLOADED", current_user.id, "Downloaded application log file")
         
-        # Read a snapshot to avoid size changes during streaming (fixes Content-Length errors)
-        content = log_file_path.read_bytes()
+        # Stream a snapshot: the size is fixed when the file is opened and reads stop there,
+        # so lines written during the download can't break Content-Length
+        log_file = open(log_file_path, "rb")
+        size = os.fstat(log_file.fileno()).st_size
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"gamerequest_logs_{timestamp}.log"
         headers = {
-            "Content-Disposition": f"attachment; filename={filename}"
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Length": str(size),
+            # Logs rotate and keep growing, never let a proxy serve a stale copy
+            "Cache-Control": "no-store"
         }
-        return Response(content=content, media_type="text/plain", headers=headers)
+        return StreamingResponse(
+            _iter_file_snapshot(log_file, size),
+            media_type="text/plain",
+            headers=headers
+        )
         
     except HTTPException:
         raise
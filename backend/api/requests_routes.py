@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 
 from models.database import get_async_db, RequestStatus, UserDB
-from models.request import GameRequest, GameRequestCreate, GameRequestUpdate, GameRequestWithUser
+from models.request import GameRequest, GameRequestCreate, GameRequestUpdate, GameRequestWithUser, GameAvailabilityRequest
 from services.request_service import RequestService
 from services.auth_deps import get_current_user, get_current_admin, get_current_user_optional
 
@@ -15,7 +15,7 @@ async def create_request(
 ):
     """Create a new game request"""
     db_request = await RequestService.create_request(request, current_user.id)
-    return GameRequest.from_orm(db_request)
+    return GameRequest.model_validate(db_request)
 
 @router.get("/", response_model=List[GameRequestWithUser])
 async def get_requests(
@@ -30,7 +30,7 @@ async def get_requests(
     db_requests = await RequestService.get_requests(status=status, user_id=user_id, skip=skip, limit=limit)
     
     # Convert to response models
-    return [RequestService.to_response_model(req) for req in db_requests]
+    return RequestService.to_response_models(db_requests)
 
 @router.get("/{request_id}", response_model=GameRequest)
 async def get_request(
@@ -46,7 +46,7 @@ async def get_request(
     if not RequestService.user_can_modify_request(request, current_user):
         raise HTTPException(status_code=403, detail="Access denied")
     
-    return GameRequest.from_orm(request)
+    return GameRequest.model_validate(request)
 
 @router.put("/{request_id}", response_model=GameRequest)
 async def update_request(
@@ -64,7 +64,7 @@ async def update_request(
         raise HTTPException(status_code=403, detail="Access denied")
     
     updated_request = await RequestService.update_request(request_id, request_update)
-    return GameRequest.from_orm(updated_request)
+    return GameRequest.model_validate(updated_request)
 
 @router.patch("/{request_id}")
 async def update_request_status(
@@ -73,18 +73,15 @@ async def update_request_status(
     current_admin: UserDB = Depends(get_current_admin)
 ):
     """Update only the status of a request (admin only)"""
-    from models.database import RequestStatus
-    
-    request = await RequestService.get_request(request_id)
-    if not request:
-        raise HTTPException(status_code=404, detail="Request not found")
-    
-    new_status = status_update.get('status')
-    if not new_status or new_status not in [status.value for status in RequestStatus]:
+    try:
+        new_status = RequestStatus(status_update.get('status'))
+    except ValueError:
         raise HTTPException(status_code=400, detail="Invalid status")
     
-    updated_request = await RequestService.update_request_status(request_id, RequestStatus(new_status))
-    return {"message": "Status updated successfully", "request": GameRequest.from_orm(updated_request)}
+    updated_request = await RequestService.update_request_status(request_id, new_status)
+    if not updated_request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return {"message": "Status updated successfully", "request": GameRequest.model_validate(updated_request)}
 
 @router.delete("/{request_id}")
 async def delete_request(
@@ -128,4 +125,9 @@ async def get_game_status(
 async def check_game_availability(igdb_id: int):
     """Check if game is available (has completed request)"""
     is_available = await RequestService.is_game_available(igdb_id)
-    return {"igdb_id": igdb_id, "is_available": is_available}
\ No newline at end of file
+    return {"igdb_id": igdb_id, "is_available": is_available}
+
+@router.post("/games/availability")
+async def check_games_availability(body: GameAvailabilityRequest):
+    """Check availability of several games in one call"""
+    return await RequestService.get_games_availability(body.ids)
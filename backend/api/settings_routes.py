@@ -8,6 +8,34 @@ from models.database import UserDB
 
 router = APIRouter()
 
+# Static entries of the placeholder log listing
+SAMPLE_LOGS = (
+    {
+        "timestamp": "2024-08-25 15:30:22",
+        "level": "INFO",
+        "message": "System started",
+        "source": "main"
+    },
+    {
+        "timestamp": "2024-08-25 15:25:15", 
+        "level": "INFO",
+        "message": "New request #123 received",
+        "source": "requests"
+    },
+    {
+        "timestamp": "2024-08-25 15:20:08",
+        "level": "WARNING", 
+        "message": "High memory usage detected",
+        "source": "system"
+    },
+    {
+        "timestamp": "2024-08-25 15:15:33",
+        "level": "INFO",
+        "message": "Backup completed successfully", 
+        "source": "backup"
+    },
+)
+
 @router.get("/settings", response_model=SystemSettings)
 async def get_settings(
     admin_user: UserDB = Depends(get_current_admin)
@@ -90,30 +118,7 @@ async def get_recent_logs(
     """Admin: Get recent log entries (placeholder)"""
     # This is a placeholder - in a real implementation you would read from log files
     sample_logs = [
-        {
-            "timestamp": "2024-08-25 15:30:22",
-            "level": "INFO",
-            "message": "System started",
-            "source": "main"
-        },
-        {
-            "timestamp": "2024-08-25 15:25:15", 
-            "level": "INFO",
-            "message": "New request #123 received",
-            "source": "requests"
-        },
-        {
-            "timestamp": "2024-08-25 15:20:08",
-            "level": "WARNING", 
-            "message": "High memory usage detected",
-            "source": "system"
-        },
-        {
-            "timestamp": "2024-08-25 15:15:33",
-            "level": "INFO",
-            "message": "Backup completed successfully", 
-            "source": "backup"
-        },
+        *SAMPLE_LOGS,
         {
             "timestamp": "2024-08-25 15:10:12",
             "level": "INFO",
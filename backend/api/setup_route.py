@@ -2,8 +2,10 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from services.setup_service import SetupService
 from services.auth_service import AuthService
+from services.auth_deps import invalidate_cached_user
 from models.user_models import UserRead
 from models.database import UserRole
+from services.logging_service import app_logger
 
 router = APIRouter()
 
@@ -26,8 +28,6 @@ async def create_admin(setup: AdminSetup):
         if not await SetupService.needs_setup():
             raise HTTPException(400, "Setup already completed")
         
-        print(f"Creating admin user: {setup.username}")
-        
         # Create admin user using AuthService
         admin_user = await AuthService.create_user(
             username=setup.username,
@@ -35,16 +35,14 @@ async def create_admin(setup: AdminSetup):
             role=UserRole.ADMIN
         )
         
-        print(f"Admin user created: {admin_user.id}, {admin_user.username}")
+        app_logger.info(f"Initial admin user created: {admin_user.username}", user_id=admin_user.id, action="SETUP_ADMIN_CREATED")
         
         # Generate token
         token = AuthService.create_access_token(data={"sub": str(admin_user.id)})
         
-        print(f"Token generated successfully")
-        
         return {
             "success": True,
-            "user": UserRead.model_validate(admin_user),
+            "user": UserRead.from_row(admin_user),
             "access_token": token,
             "token_type": "bearer"
         }
@@ -52,16 +50,14 @@ async def create_admin(setup: AdminSetup):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Setup failed with error: {str(e)}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        traceback.print_exc()
+        app_logger.error(f"Setup failed: {str(e)}", action="SETUP_ERROR")
         raise HTTPException(500, f"Setup failed: {str(e)}")
 
 @router.post("/reset")
 async def reset_setup():
     """Reset setup by deleting admin users"""
     deleted_count = await SetupService.reset_setup()
+    invalidate_cached_user()
     return {
         "message": f"Setup reset - deleted {deleted_count} admin users",
         "can_setup": True
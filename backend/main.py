@@ -1,7 +1,9 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import os
 from pathlib import Path
 
@@ -21,11 +23,26 @@ from api.debug_routes import router as debug_router
 
 from services.redis_client       import get_redis, close_redis, clear_cache
 from services.igdb_client       import igdb_client
+from services.gameyfin_client   import close_gameyfin_client
+from services.settings_service  import close_telegram_client
+from services.telegram_service  import telegram_service
 from services.popularity_service import refresh_all_popularities
 from services.logging_service   import app_logger
 from services.request_logging_middleware import RequestLoggingMiddleware
 from services.exception_logging_middleware import ExceptionLoggingMiddleware
 
+async def _reset_cache_and_token():
+    # The Twitch token is shared through Redis, so fetch it after the flush
+    await clear_cache()
+    await igdb_client._get_access_token()
+
+async def _warm_popularities():
+    try:
+        await refresh_all_popularities()
+        app_logger.info("Popularity caches warmed", action="CACHE_WARMUP")
+    except Exception as e:
+        app_logger.error(f"Popularity cache warmup failed: {str(e)}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- Startup ---
@@ -37,27 +54,35 @@ async def lifespan(app: FastAPI):
     # Initialize logging
     app_logger.info("GameRequest application starting up", action="SYSTEM_STARTUP")
 
-    # Delete old cache
-    await clear_cache()
-
-    # Cleanup old logs on startup
-    await app_logger.cleanup_old_logs()
-
     # Initialize Redis connection
     app.state.redis = await get_redis()
     igdb_client.redis = app.state.redis
 
-    # Get Twitch token and fill popularities cache
-    await igdb_client._get_access_token()
-    await refresh_all_popularities()
+    # Independent startup steps: cleanup old logs, clear old cache then get Twitch token
+    await asyncio.gather(
+        app_logger.cleanup_old_logs(),
+        _reset_cache_and_token(),
+    )
+
+    # Fill popularities cache in the background; the routes compute on a miss
+    app.state.popularity_warmup = asyncio.create_task(_warm_popularities())
 
     yield  # hier laufen deine Endpoints
 
     # --- Shutdown ---
     app_logger.info("GameRequest application shutting down", action="SYSTEM_SHUTDOWN")
+    app.state.popularity_warmup.cancel()
     await close_redis()
-
-app = FastAPI(title="Game Request Tool Backend", lifespan=lifespan)
+    await igdb_client.client.aclose()
+    await close_gameyfin_client()
+    await close_telegram_client()
+    await telegram_service.aclose()
+
+app = FastAPI(
+    title="Game Request Tool Backend",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # orjson encodes responses in C
+)
 
 # Configure CORS
 # Get allowed origins from environment or use default "*" for development
@@ -1,10 +1,12 @@
 import enum
 import os
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum as SQLEnum, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum as SQLEnum, Boolean, ForeignKey, Index, inspect
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.expression import FunctionElement
 from services.logging_service import app_logger
 
 Base = declarative_base()
@@ -27,13 +29,49 @@ if not DATABASE_URL:
         # Fallback to SQLite for development
         DATABASE_URL = "sqlite+aiosqlite:///./game_requests.db"
 
-async_engine = create_async_engine(DATABASE_URL, echo=False)
+# Connection pool sizing (override via environment for larger deployments)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+connect_args = {}
+if DATABASE_URL.startswith("postgresql+asyncpg") and os.getenv("DB_USE_PGBOUNCER", "").lower() in ("1", "true", "yes"):
+    # pgbouncer (transaction pooling) can't keep prepared statements per connection
+    connect_args = {"server_settings": {"jit": "off"}, "statement_cache_size": 0}
+
+async_engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=True,  # Detect connections dropped by the server before use
+    pool_recycle=DB_POOL_RECYCLE,
+    connect_args=connect_args
+)
 AsyncSessionLocal = async_sessionmaker(
     async_engine, 
     class_=AsyncSession, 
     expire_on_commit=False
 )
 
+# Timestamps are stored as naive UTC and generated by the database.
+# Columns use it as default and server_default, so ORM inserts set it explicitly
+# even on old SQLite tables whose columns have no default.
+class utcnow(FunctionElement):
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"  # SQLite: already UTC
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
 # Enums
 class UserRole(str, enum.Enum):
     USER = "user"
@@ -51,16 +89,19 @@ class UserDB(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
+    hashed_password = Column(String(128), nullable=False)  # bcrypt_sha256 v2 hashes are 83 chars, plain bcrypt 60
     role = Column(SQLEnum(UserRole), default=UserRole.USER, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     is_superuser = Column(Boolean, default=False, nullable=False)
     is_verified = Column(Boolean, default=True, nullable=False)  # Immer True
     last_login = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow(), server_default=utcnow())
     
     # Relationships
     requests = relationship("GameRequestDB", back_populates="requester")
+    
+    # Fetch server generated timestamps with RETURNING on flush
+    __mapper_args__ = {"eager_defaults": True}
 
 # Game Request Model
 class GameRequestDB(Base):
@@ -74,14 +115,27 @@ class GameRequestDB(Base):
     comment = Column(Text, nullable=True)  # Renamed from description
     status = Column(SQLEnum(RequestStatus), default=RequestStatus.PENDING)
     admin_notes = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow(), server_default=utcnow())
+    updated_at = Column(DateTime, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
     
     # Foreign Key
     requester_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Relationships
-    requester = relationship("UserDB", back_populates="requests")
+    # Loaded with the request by default, lazy loads would fail under async
+    requester = relationship("UserDB", back_populates="requests", lazy="selectin")
+    
+    __table_args__ = (
+        # Covers the import name/IGDB duplicate checks
+        Index("ix_game_requests_name_igdb", "game_name", "igdb_id"),
+        # Covers the filtered, newest-first request listing
+        Index("ix_game_requests_status_requester_created", status, requester_id, created_at.desc()),
+        # Covers the per-game status/availability checks
+        Index("ix_game_requests_igdb_status", igdb_id, status),
+        # Covers the per-user active request count
+        Index("ix_game_requests_requester_status", requester_id, status),
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
 # System Settings Model (Single row table for configuration)
 class SystemSettingsDB(Base):
@@ -113,49 +167,75 @@ class SystemSettingsDB(Base):
     log_level = Column(String, default="INFO")
     
     # Metadata
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
+    
+    __mapper_args__ = {"eager_defaults": True}
 
 # Async Database Dependencies
 async def get_async_db():
     async with AsyncSessionLocal() as session:
         try:
-            app_logger.info("Async database session opened", action="DB_SESSION_OPEN")
             yield session
         except Exception as e:
             app_logger.error(f"Async database session error: {str(e)}")
             raise
-        finally:
-            app_logger.info("Async database session closed", action="DB_SESSION_CLOSE")
 
 # Database Creation
+# Indexes of earlier versions that are superseded by the ones declared above
+REPLACED_INDEXES = (
+    "ix_requests_igdb_id",
+    "ix_game_requests_requester_id",
+    "idx_game_requests_name_igdb",
+    "ix_requests_status_requester_created",
+    "ix_requests_igdb_status",
+    "ix_requests_requester_status",
+)
+
 async def create_tables():
     try:
         async with async_engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
-            # Ensure new columns exist for existing databases
-            await _ensure_system_settings_columns(conn)
-            await _ensure_user_columns(conn)
+            # create_all skips existing tables, so add indexes introduced later
+            # and drop the ones they replaced
+            await conn.run_sync(_drop_replaced_indexes)
+            await conn.run_sync(_create_missing_indexes)
+            await conn.run_sync(_sync_server_defaults)
         app_logger.info("Async database tables created successfully", action="DB_TABLES_CREATE")
     except Exception as e:
         app_logger.error(f"Async database table creation failed: {str(e)}")
         raise
 
-async def _ensure_system_settings_columns(conn):
-    """Lightweight migration to add missing columns to system_settings."""
-    try:
-        # Skip PRAGMA check for PostgreSQL - tables are created by SQLAlchemy
-        app_logger.info("System settings columns verified")
-    except Exception as e:
-        app_logger.error(f"Failed to ensure system_settings columns: {e}")
+def _drop_replaced_indexes(sync_conn):
+    """Drop indexes that were replaced or renamed so writes stop maintaining them."""
+    for index_name in REPLACED_INDEXES:
+        sync_conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index_name}")
 
+def _create_missing_indexes(sync_conn):
+    """Create model indexes that don't exist yet on already created tables."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
 
-async def _ensure_user_columns(conn):
-    """Lightweight migration to add missing columns to users."""
-    try:
-        # Skip PRAGMA check for PostgreSQL - tables are created by SQLAlchemy
-        app_logger.info("User columns verified")
-    except Exception as e:
-        app_logger.error(f"Failed to ensure users columns: {e}")
+def _sync_server_defaults(sync_conn):
+    """Add column defaults introduced later to already created PostgreSQL tables."""
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        existing_defaults = {column["name"]: column["default"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.server_default is None or existing_defaults.get(column.name) is not None:
+                continue
+            if sync_conn.dialect.name != "postgresql":
+                # SQLite can't alter column defaults; the column default still fills ORM inserts
+                app_logger.info(
+                    f"{table.name}.{column.name} has no server default, only ORM inserts set it",
+                    action="DB_MIGRATE"
+                )
+                continue
+            default_sql = column.server_default.arg.compile(dialect=sync_conn.dialect)
+            sync_conn.exec_driver_sql(
+                f'ALTER TABLE {table.name} ALTER COLUMN {column.name} SET DEFAULT {default_sql}'
+            )
+            app_logger.info(f"Added server default to {table.name}.{column.name}", action="DB_MIGRATE")
 
 # Backward compatibility (falls alte Imports existieren)
 get_db = get_async_db
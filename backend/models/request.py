@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, TypeAdapter
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from models.database import RequestStatus
 from models.user_models import UserSummary
 
@@ -26,9 +26,16 @@ class GameRequest(GameRequestBase):
     updated_at: datetime
     admin_notes: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Response Model with User Info for Frontend
 class GameRequestWithUser(GameRequest):
-    user: Optional[UserSummary] = None
\ No newline at end of file
+    # Read from GameRequestDB.requester when validating ORM objects
+    user: Optional[UserSummary] = Field(None, validation_alias=AliasChoices("user", "requester"))
+
+# Validates a whole result list in one call instead of per row
+GAME_REQUEST_WITH_USER_LIST = TypeAdapter(List[GameRequestWithUser])
+
+# Batch availability lookup for search result grids
+class GameAvailabilityRequest(BaseModel):
+    ids: List[int] = Field(..., max_length=500)
@@ -1,29 +1,32 @@
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
 from typing import Optional
 
 class SystemSettings(BaseModel):
+    # Fields also validate from the snake_case columns of SystemSettingsDB
+    model_config = ConfigDict(from_attributes=True)
+    
     # General Settings
-    maxRequestsPerUser: int = -1  # -1 = unlimited (only applies to regular users, not admins)
+    maxRequestsPerUser: int = Field(-1, validation_alias=AliasChoices("maxRequestsPerUser", "max_requests_per_user"))  # -1 = unlimited (only applies to regular users, not admins)
     
     # Request Management
-    requireAdminApproval: bool = True
-    allowUserRequestDeletion: bool = False
+    requireAdminApproval: bool = Field(True, validation_alias=AliasChoices("requireAdminApproval", "require_admin_approval"))
+    allowUserRequestDeletion: bool = Field(False, validation_alias=AliasChoices("allowUserRequestDeletion", "allow_user_request_deletion"))
     
     # Telegram Notifications
-    telegramEnabled: bool = False
-    telegramBotToken: str = ""
-    telegramChatId: str = ""
-    notifyOnNewRequest: bool = True
-    notifyOnStatusChange: bool = True
-    notifyOnUserRegistration: bool = False
-    notifyOnSystemErrors: bool = False
+    telegramEnabled: bool = Field(False, validation_alias=AliasChoices("telegramEnabled", "telegram_enabled"))
+    telegramBotToken: str = Field("", validation_alias=AliasChoices("telegramBotToken", "telegram_bot_token"))
+    telegramChatId: str = Field("", validation_alias=AliasChoices("telegramChatId", "telegram_chat_id"))
+    notifyOnNewRequest: bool = Field(True, validation_alias=AliasChoices("notifyOnNewRequest", "notify_on_new_request"))
+    notifyOnStatusChange: bool = Field(True, validation_alias=AliasChoices("notifyOnStatusChange", "notify_on_status_change"))
+    notifyOnUserRegistration: bool = Field(False, validation_alias=AliasChoices("notifyOnUserRegistration", "notify_on_user_registration"))
+    notifyOnSystemErrors: bool = Field(False, validation_alias=AliasChoices("notifyOnSystemErrors", "notify_on_system_errors"))
     
     # Logging
-    enableApplicationLogs: bool = True
-    enableErrorLogs: bool = True
-    enableAuditLogs: bool = True
-    logRetentionDays: int = 30
-    logLevel: str = "INFO"
+    enableApplicationLogs: bool = Field(True, validation_alias=AliasChoices("enableApplicationLogs", "enable_application_logs"))
+    enableErrorLogs: bool = Field(True, validation_alias=AliasChoices("enableErrorLogs", "enable_error_logs"))
+    enableAuditLogs: bool = Field(True, validation_alias=AliasChoices("enableAuditLogs", "enable_audit_logs"))
+    logRetentionDays: int = Field(30, validation_alias=AliasChoices("logRetentionDays", "log_retention_days"))
+    logLevel: str = Field("INFO", validation_alias=AliasChoices("logLevel", "log_level"))
 
 class TelegramTestRequest(BaseModel):
     bot_token: str
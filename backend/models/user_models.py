@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 from models.database import UserRole
@@ -13,8 +13,12 @@ class UserRead(BaseModel):
     is_verified: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+    
+    @classmethod
+    def from_row(cls, row) -> "UserRead":
+        """Build from a trusted DB row (UserDB or column row) without re-validating it"""
+        return cls.model_construct(**{field: getattr(row, field) for field in cls.model_fields})
 
 class UserCreate(BaseModel):
     """User Create Schema"""
@@ -58,7 +62,7 @@ class Token(BaseModel):
 class UserSummary(BaseModel):
     id: int
     username: str
-    full_name: Optional[str] = None
+    # UserDB has no full_name, so fall back to the username
+    full_name: Optional[str] = Field(None, validation_alias=AliasChoices("full_name", "username"))
     
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -1,14 +1,59 @@
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy import select
 from models.database import AsyncSessionLocal, UserDB, UserRole
 from services.auth_service import AuthService
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 # Security scheme
 security = HTTPBearer()
 security_optional = HTTPBearer(auto_error=False)
 
+# Authenticated users: user id -> (detached UserDB, cached until)
+USER_CACHE_MAX_SIZE = 10_000
+USER_CACHE_TTL_SECONDS = 30
+_user_cache: Dict[int, Tuple[UserDB, float]] = {}
+
+def invalidate_cached_user(user_id: Optional[int] = None) -> None:
+    """Drop a changed or deleted user from the cache, or every user if no id is given"""
+    if user_id is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(user_id, None)
+
+async def _get_user(user_id: int) -> Optional[UserDB]:
+    """Load the user, reusing recent lookups for USER_CACHE_TTL_SECONDS"""
+    now = time.time()
+    cached = _user_cache.get(user_id)
+    if cached and cached[1] > now:
+        return cached[0]
+    
+    user = await AuthService.get_user_by_id(user_id)
+    if user is None:
+        _user_cache.pop(user_id, None)
+        return None
+    
+    if len(_user_cache) >= USER_CACHE_MAX_SIZE:
+        _user_cache.clear()
+    _user_cache[user_id] = (user, now + USER_CACHE_TTL_SECONDS)
+    return user
+
+def _get_user_id_from_token(token: str) -> Optional[int]:
+    """Decode the token's user id"""
+    payload = AuthService.verify_token(token)
+    if payload is None:
+        return None
+    
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+    
+    try:
+        return int(user_id)
+    except ValueError:
+        return None
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserDB:
     """Get current authenticated user"""
     credentials_exception = HTTPException(
@@ -18,23 +63,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     )
     
     # Verify token
-    token = credentials.credentials
-    payload = AuthService.verify_token(token)
-    
-    if payload is None:
-        raise credentials_exception
-    
-    user_id = payload.get("sub")
+    user_id = _get_user_id_from_token(credentials.credentials)
     if user_id is None:
         raise credentials_exception
     
-    try:
-        user_id = int(user_id)
-    except ValueError:
-        raise credentials_exception
-    
     # Get user from database
-    user = await AuthService.get_user_by_id(user_id)
+    user = await _get_user(user_id)
     if user is None or not user.is_active:
         raise credentials_exception
     
@@ -1,35 +1,98 @@
-from passlib.context import CryptContext
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
-from sqlalchemy import select
+from typing import Optional, Tuple
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
 from models.database import AsyncSessionLocal, UserDB, UserRole
 from services.telegram_service import telegram_service
 from services.logging_service import app_logger
 
-# Password context
-# Use bcrypt_sha256 to remove the 72-byte password limit but keep compatibility with existing hashes
-pwd_context = CryptContext(
-    schemes=["bcrypt_sha256", "bcrypt"],
-    deprecated="auto"
-)
+# Password hashing
+# bcrypt_sha256 (passlib's v2 format) removes the 72-byte password limit.
+# Plain bcrypt hashes created before are still verified.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_SHA256_PREFIX = "$bcrypt-sha256$"
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+def _bcrypt_sha256_key(secret: bytes, salt: str, version: int) -> bytes:
+    """Pre-hash the password the way passlib's bcrypt_sha256 does"""
+    if version == 1:
+        digest = hashlib.sha256(secret).digest()
+    else:
+        digest = hmac.new(salt.encode("ascii"), secret, hashlib.sha256).digest()
+    return base64.b64encode(digest)
+
+def _verify_bcrypt_sha256(secret: bytes, hashed_password: str) -> bool:
+    # v2: $bcrypt-sha256$v=2,t=2b,r=12$<salt>$<checksum>, v1: $bcrypt-sha256$2b,12$<salt>$<checksum>
+    params, salt, checksum = hashed_password[len(BCRYPT_SHA256_PREFIX):].split("$")
+    if params.startswith("v="):
+        options = dict(option.split("=", 1) for option in params.split(","))
+        version, ident, rounds = int(options["v"]), options["t"], int(options["r"])
+    else:
+        version = 1
+        ident, rounds = params.split(",")
+        rounds = int(rounds)
+    key = _bcrypt_sha256_key(secret, salt, version)
+    return bcrypt.checkpw(key, f"${ident}${rounds:02d}${salt}{checksum}".encode("ascii"))
 
 # JWT settings
 SECRET_KEY = "game-request-secret-key-change-in-production-2024"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
 
+# Verified token payloads: token digest -> (payload, valid until), least recently used first
+TOKEN_CACHE_MAX_SIZE = 10_000
+TOKEN_CACHE_TTL_SECONDS = 60
+_token_cache: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+
+# bcrypt releases the GIL; a dedicated pool keeps login bursts off the event loop
+# without starving the default executor used for file IO
+_password_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="password-hash")
+
 class AuthService:
     
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         """Verify password against hash"""
-        return pwd_context.verify(plain_password, hashed_password)
+        secret = plain_password.encode("utf-8")
+        try:
+            if hashed_password.startswith(BCRYPT_SHA256_PREFIX):
+                return _verify_bcrypt_sha256(secret, hashed_password)
+            # Legacy plain bcrypt hash, bcrypt only ever used the first 72 bytes
+            return bcrypt.checkpw(secret[:BCRYPT_MAX_PASSWORD_BYTES], hashed_password.encode("ascii"))
+        except ValueError:
+            # Malformed or unknown hash
+            return False
     
     @staticmethod
     def get_password_hash(password: str) -> str:
         """Hash password"""
-        return pwd_context.hash(password)
+        config = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+        ident, rounds, salt = config.decode("ascii").split("$")[1:]
+        key = _bcrypt_sha256_key(password.encode("utf-8"), salt, version=2)
+        checksum = bcrypt.hashpw(key, config).decode("ascii")[len(config):]
+        return f"{BCRYPT_SHA256_PREFIX}v=2,t={ident},r={int(rounds)}${salt}${checksum}"
+    
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Verify password against hash in the password hashing pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, AuthService.verify_password, plain_password, hashed_password)
+    
+    @staticmethod
+    async def get_password_hash_async(password: str) -> str:
+        """Hash password in the password hashing pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, AuthService.get_password_hash, password)
     
     @staticmethod
     def validate_password(password: str) -> None:
@@ -37,13 +100,23 @@ class AuthService:
         if len(password) < 8:
             raise ValueError("Password must be at least 8 characters long")
         
-        if not any(c.isupper() for c in password):
+        # One pass over the password; str methods keep non-ASCII letters (e.g. "Ä") counting
+        has_upper = has_lower = has_digit = False
+        for c in password:
+            if c.isupper():
+                has_upper = True
+            elif c.islower():
+                has_lower = True
+            elif c.isdigit():
+                has_digit = True
+        
+        if not has_upper:
             raise ValueError("Password must contain at least one uppercase letter")
         
-        if not any(c.islower() for c in password):
+        if not has_lower:
             raise ValueError("Password must contain at least one lowercase letter")
         
-        if not any(c.isdigit() for c in password):
+        if not has_digit:
             raise ValueError("Password must contain at least one number")
     
     @staticmethod
@@ -56,12 +129,30 @@ class AuthService:
     
     @staticmethod
     def verify_token(token: str) -> Optional[dict]:
-        """Verify JWT token"""
+        """Verify JWT token, reusing the result for repeated tokens until TTL or expiry"""
+        # Key on a digest so full tokens aren't kept in memory
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        now = time.time()
+        cached = _token_cache.get(key)
+        if cached is not None:
+            payload, valid_until = cached
+            if valid_until > now:
+                _token_cache.move_to_end(key)
+                return payload
+            del _token_cache[key]
+        
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload
         except JWTError:
             return None
+        
+        valid_until = now + TOKEN_CACHE_TTL_SECONDS
+        if "exp" in payload:
+            valid_until = min(valid_until, float(payload["exp"]))
+        _token_cache[key] = (payload, valid_until)
+        if len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+            _token_cache.popitem(last=False)
+        return payload
     
     @staticmethod
     async def authenticate_user(username: str, password: str) -> Optional[UserDB]:
@@ -76,14 +167,14 @@ class AuthService:
                 app_logger.warning(f"Failed login attempt for username: {username} (user not found or inactive)")
                 return None
                 
-            if not AuthService.verify_password(password, user.hashed_password):
+            if not await AuthService.verify_password_async(password, user.hashed_password):
                 app_logger.warning(f"Failed login attempt for username: {username} (invalid password)", user_id=user.id)
                 return None
             
             # Update last login timestamp
             user.last_login = datetime.utcnow()
+            # expire_on_commit=False keeps the loaded fields, nothing else changes server-side
             await session.commit()
-            await session.refresh(user)
 
             app_logger.info(f"Successful login for user: {username}", user_id=user.id, action="USER_LOGIN")
             return user
@@ -104,17 +195,10 @@ class AuthService:
         AuthService.validate_password(password)
         
         async with AsyncSessionLocal() as session:
-            # Check if user exists
-            result = await session.execute(
-                select(UserDB).where(UserDB.username == username)
-            )
-            if result.first():
-                raise ValueError("Username already exists")
-            
-            # Create user
+            # Create user, the unique username constraint rejects duplicates
             user = UserDB(
                 username=username,
-                hashed_password=AuthService.get_password_hash(password),
+                hashed_password=await AuthService.get_password_hash_async(password),
                 role=role,
                 is_active=True,
                 is_superuser=role == UserRole.ADMIN,
@@ -122,8 +206,11 @@ class AuthService:
             )
             
             session.add(user)
-            await session.commit()
-            await session.refresh(user)
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                raise ValueError("Username already exists")
             
             # Log user creation
             app_logger.audit(
@@ -136,7 +223,10 @@ class AuthService:
             # Only for regular users, not admin users created by setup
             if role == UserRole.USER:
                 try:
-                    await telegram_service.notify_user_registration(username)
+                    telegram_service.send_in_background(
+                        telegram_service.notify_user_registration(username),
+                        "user registration"
+                    )
                 except Exception as e:
                     # Don't fail user creation if notification fails
                     app_logger.error(f"Failed to send Telegram notification for user registration: {str(e)}", user_id=user.id)
@@ -147,27 +237,28 @@ class AuthService:
     async def update_user_profile(user_id: int, new_username: str) -> UserDB:
         """Update user profile (username)"""
         async with AsyncSessionLocal() as session:
-            # Get current user
+            # Load the current user and a user already owning the new name in one query
             result = await session.execute(
-                select(UserDB).where(UserDB.id == user_id)
+                select(UserDB).where(or_(UserDB.id == user_id, UserDB.username == new_username))
             )
-            user = result.scalar_one_or_none()
+            user = None
+            name_taken = False
+            for row in result.scalars():
+                if row.id == user_id:
+                    user = row
+                else:
+                    name_taken = True
             
             if not user:
                 raise ValueError("User not found")
             
-            # Check if new username already exists (if different from current)
             if new_username != user.username:
-                username_check = await session.execute(
-                    select(UserDB).where(UserDB.username == new_username)
-                )
-                if username_check.scalar_one_or_none():
+                if name_taken:
                     raise ValueError("Username already exists")
                 
                 user.username = new_username
             
             await session.commit()
-            await session.refresh(user)
             return user
     
     @staticmethod
@@ -187,10 +278,10 @@ class AuthService:
                 raise ValueError("User not found")
             
             # Verify current password
-            if not AuthService.verify_password(current_password, user.hashed_password):
+            if not await AuthService.verify_password_async(current_password, user.hashed_password):
                 raise ValueError("Current password is incorrect")
             
             # Update password
-            user.hashed_password = AuthService.get_password_hash(new_password)
+            user.hashed_password = await AuthService.get_password_hash_async(new_password)
             await session.commit()
             return True
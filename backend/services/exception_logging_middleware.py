@@ -1,19 +1,37 @@
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
-from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from services.logging_service import app_logger
 import traceback
 
-class ExceptionLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class ExceptionLoggingMiddleware:
+    # Plain ASGI middleware, BaseHTTPMiddleware adds a task and a stream per request
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_wrapper)
         except Exception as exc:  # noqa: BLE001
             # Log full stack trace
             tb_str = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
-            app_logger.error(f"Unhandled exception during request {request.url.path}: {exc}\n{tb_str}", exc_info=True)
-            return JSONResponse(
+            app_logger.error(f"Unhandled exception during request {scope['path']}: {exc}\n{tb_str}", exc_info=True)
+            if response_started:
+                # Headers are already sent, a 500 can't replace the response anymore
+                raise
+            response = JSONResponse(
                 status_code=500,
                 content={"detail": "Internal server error"}
             )
+            await response(scope, receive, send)
@@ -4,8 +4,18 @@ import os
 # Work with environment variables to be added later
 GAMEYFIN_URL = os.getenv("GAMEYFIN_URL", "http://localhost:8080")
 
+# One long-lived client so calls reuse pooled connections instead of reconnecting each time
+_client = httpx.AsyncClient(
+    base_url=GAMEYFIN_URL,
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=httpx.Timeout(10.0)
+)
+
 async def get_gameyfin_library():
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{GAMEYFIN_URL}/v1/games")
-        response.raise_for_status()
-        return response.json()
+    response = await _client.get("/v1/games")
+    response.raise_for_status()
+    return response.json()
+
+async def close_gameyfin_client() -> None:
+    await _client.aclose()
@@ -1,10 +1,13 @@
-import json
+import asyncio
+import hashlib
 import logging
 import time
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
 import os
 import httpx
-from typing import List, Optional, Dict, Any, Set
+import orjson
+from typing import List, Optional, Dict, Any, Set, Tuple
 
 from dotenv import load_dotenv
 from services.logging_service import app_logger
@@ -16,6 +19,54 @@ IGDB_CLIENT_SECRET = os.getenv("IGDB_CLIENT_SECRET")
 TOKEN_URL          = "https://id.twitch.tv/oauth2/token"
 IGDB_BASE_URL      = "https://api.igdb.com/v4"
 
+# Shared connection pool; IGDB allows at most 8 open requests per client
+IGDB_MAX_CONCURRENT_REQUESTS = 8
+IGDB_HTTP_LIMITS   = httpx.Limits(
+    max_connections=IGDB_MAX_CONCURRENT_REQUESTS,
+    max_keepalive_connections=IGDB_MAX_CONCURRENT_REQUESTS,
+)
+IGDB_HTTP_TIMEOUT  = httpx.Timeout(10.0)
+
+# Backoff for 429 responses (IGDB allows about 4 requests per second)
+IGDB_RATE_LIMIT_RETRIES     = 3
+IGDB_RATE_LIMIT_BACKOFF     = 0.5
+IGDB_RATE_LIMIT_MAX_BACKOFF = 5.0
+
+# The Twitch token is shared through Redis so every worker reuses one token
+IGDB_TOKEN_CACHE_KEY     = "igdb:token"
+IGDB_TOKEN_LOCK_KEY      = "igdb:token_lock"
+IGDB_TOKEN_LOCK_SECONDS  = 10
+IGDB_TOKEN_POLL_INTERVAL = 0.1
+
+# Per-process search cache (L1 in front of IGDB), keyed by normalized term and limit
+SEARCH_CACHE_MAX_SIZE    = 1024
+SEARCH_CACHE_TTL_SECONDS = 300
+
+# Shared IGDB response cache (L2 in Redis) with a short single-flight lock per key
+IGDB_SEARCH_CACHE_TTL_SECONDS = 300
+IGDB_DETAIL_CACHE_TTL_SECONDS = 3600
+IGDB_GENRE_CACHE_TTL_SECONDS  = 1800
+IGDB_EMPTY_CACHE_TTL_SECONDS  = 60  # unknown games/empty results, so new IGDB entries show up soon
+IGDB_CACHE_LOCK_MS            = 5000
+IGDB_CACHE_POLL_INTERVAL      = 0.05
+
+# Apicalypse search query for PC games, shared by single and batched searches
+IGDB_SEARCH_QUERY = (
+    'search "{term}"; '
+    'fields id, name, slug, first_release_date, cover.image_id, genres.name; '
+    'where cover != null & platforms.slug = "win"; '
+    'limit {limit};'
+)
+# Search terms are user input, quotes and backslashes must not end the string literal
+_IGDB_STRING_ESCAPES = str.maketrans({'"': '\\"', "\\": "\\\\"})
+
+def _igdb_search_query(term: str, limit: int) -> str:
+    return IGDB_SEARCH_QUERY.format(term=term.translate(_IGDB_STRING_ESCAPES), limit=int(limit))
+
+def _cache_ttl(value: Any, ttl: int) -> int:
+    """Negative cache: repeated probes for missing games don't reach IGDB for a while"""
+    return ttl if value else min(ttl, IGDB_EMPTY_CACHE_TTL_SECONDS)
+
 _token_cache: Optional[str] = None
 
 logging.basicConfig(
@@ -42,23 +93,147 @@ def transform_game_basic_info(raw: dict) -> dict:
         "genre_names":        genre_names,
     }
 
+def game_stub(game_id: int) -> dict:
+    """
+    Placeholder in the transform_game_basic_info shape for a game IGDB didn't return.
+    """
+    return {
+        "id":                 game_id,
+        "name":               None,
+        "slug":               None,
+        "cover":              None,
+        "first_release_date": None,
+        "total_rating_count": None,
+        "genre_names":        [],
+    }
+
 class IgdbClient:
     def __init__(self):
-        self.client = httpx.AsyncClient()
+        self.client = httpx.AsyncClient(http2=True, limits=IGDB_HTTP_LIMITS, timeout=IGDB_HTTP_TIMEOUT)
         self.token: Optional[str] = None
         self.token_expires_at: Optional[datetime] = None
         self.redis = None
+        self._search_cache: "OrderedDict[Tuple[str, int], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
 
     
     async def _get_redis(self):
         return self.redis
 
+    @staticmethod
+    def _search_cache_key(search_term: str, limit: int) -> Tuple[str, int]:
+        return (search_term.strip().casefold(), limit)
+
+    def _get_cached_search(self, search_term: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        key = self._search_cache_key(search_term, limit)
+        entry = self._search_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, results = entry
+        if expires_at < time.monotonic():
+            del self._search_cache[key]
+            return None
+        self._search_cache.move_to_end(key)
+        return results
+
+    def _set_cached_search(self, search_term: str, limit: int, results: List[Dict[str, Any]]) -> None:
+        key = self._search_cache_key(search_term, limit)
+        self._search_cache[key] = (time.monotonic() + SEARCH_CACHE_TTL_SECONDS, results)
+        self._search_cache.move_to_end(key)
+        while len(self._search_cache) > SEARCH_CACHE_MAX_SIZE:
+            self._search_cache.popitem(last=False)
+
+    @staticmethod
+    def _search_redis_key(search_term: str, limit: int) -> str:
+        term, _ = IgdbClient._search_cache_key(search_term, limit)
+        return f"igdb:search:{hashlib.blake2b(term.encode(), digest_size=16).hexdigest()}:{limit}"
+
+    async def _cached_json(self, key: str, ttl: int, fetch):
+        """
+        Read-through Redis cache for IGDB responses. On a miss only one caller
+        fetches (SET NX lock), concurrent callers wait briefly for its result.
+        Empty results (None, []) are cached too, with a shorter TTL.
+        Without Redis, or if Redis fails, fetch() is called directly.
+        """
+        redis = await self._get_redis()
+        if redis is None:
+            return await fetch()
+
+        lock_key = f"{key}:lock"
+        try:
+            cached = await redis.get(key)
+            if cached is not None:
+                return orjson.loads(cached)
+            if not await redis.set(lock_key, "1", nx=True, px=IGDB_CACHE_LOCK_MS):
+                for _ in range(int(IGDB_CACHE_LOCK_MS / 1000 / IGDB_CACHE_POLL_INTERVAL)):
+                    await asyncio.sleep(IGDB_CACHE_POLL_INTERVAL)
+                    cached = await redis.get(key)
+                    if cached is not None:
+                        return orjson.loads(cached)
+        except Exception as e:
+            app_logger.warning(f"IGDB cache read failed for {key}: {str(e)}")
+            return await fetch()
+
+        try:
+            value = await fetch()
+        except Exception:
+            await redis.delete(lock_key)
+            raise
+
+        try:
+            pipe = redis.pipeline()
+            pipe.set(key, orjson.dumps(value), ex=_cache_ttl(value, ttl))
+            pipe.delete(lock_key)
+            await pipe.execute()
+        except Exception as e:
+            app_logger.warning(f"IGDB cache write failed for {key}: {str(e)}")
+        return value
+
+    async def _get_shared_token(self, redis) -> Optional[str]:
+        """Adopt a token another worker stored in Redis, keeping its remaining lifetime"""
+        pipe = redis.pipeline()
+        pipe.get(IGDB_TOKEN_CACHE_KEY)
+        pipe.ttl(IGDB_TOKEN_CACHE_KEY)
+        token, ttl = await pipe.execute()
+        if not token or ttl <= 0:
+            return None
+        self.token = token
+        self.token_expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+        return token
+
+    async def _invalidate_token(self, rejected_token: str) -> None:
+        """Forget a token IGDB rejected, locally and in Redis unless a worker already replaced it"""
+        self.token = None
+        self.token_expires_at = None
+        redis = await self._get_redis()
+        if redis is None:
+            return
+        try:
+            if await redis.get(IGDB_TOKEN_CACHE_KEY) == rejected_token:
+                await redis.delete(IGDB_TOKEN_CACHE_KEY)
+        except Exception as e:
+            app_logger.warning(f"Failed to drop shared IGDB token: {str(e)}")
+
     async def _get_access_token(self) -> str:
         now = datetime.utcnow()
         if self.token and self.token_expires_at and now < self.token_expires_at:
             logging.debug("[TOKEN] Returning cached token")
             return self.token
 
+        redis = await self._get_redis()
+        if redis is not None:
+            try:
+                if await self._get_shared_token(redis):
+                    return self.token
+                # Only one worker fetches; the others wait for it to publish the token
+                if not await redis.set(IGDB_TOKEN_LOCK_KEY, "1", nx=True, ex=IGDB_TOKEN_LOCK_SECONDS):
+                    for _ in range(int(IGDB_TOKEN_LOCK_SECONDS / IGDB_TOKEN_POLL_INTERVAL)):
+                        await asyncio.sleep(IGDB_TOKEN_POLL_INTERVAL)
+                        if await self._get_shared_token(redis):
+                            return self.token
+            except Exception as e:
+                app_logger.warning(f"Shared IGDB token lookup failed: {str(e)}")
+                redis = None
+
         logging.info("[TOKEN] Fetching new access token from Twitch")
         params = {
             "client_id": IGDB_CLIENT_ID,
@@ -68,14 +243,42 @@ class IgdbClient:
 
         r = await self.client.post(TOKEN_URL, params=params)
         r.raise_for_status()
-        data = r.json()
+        data = orjson.loads(r.content)
         self.token = data["access_token"]
         # expires_in is in seconds; refresh a minute early
         expires_in = data.get("expires_in", 0)
         self.token_expires_at = now + timedelta(seconds=max(expires_in - 60, 0))
+
+        if redis is not None and expires_in > 60:
+            try:
+                pipe = redis.pipeline()
+                pipe.set(IGDB_TOKEN_CACHE_KEY, self.token, ex=expires_in - 60)
+                pipe.delete(IGDB_TOKEN_LOCK_KEY)
+                await pipe.execute()
+            except Exception as e:
+                app_logger.warning(f"Failed to share IGDB token: {str(e)}")
         return self.token
 
 
+    async def _post_with_backoff(self, url: str, headers: Dict[str, str], query: str) -> httpx.Response:
+        """
+        Sends the POST request and retries rate-limited (429) responses,
+        waiting for Retry-After or an exponential backoff.
+        """
+        for attempt in range(IGDB_RATE_LIMIT_RETRIES + 1):
+            resp = await self.client.post(url, headers=headers, content=query)
+            if resp.status_code != 429 or attempt == IGDB_RATE_LIMIT_RETRIES:
+                return resp
+
+            try:
+                delay = float(resp.headers.get("Retry-After", ""))
+            except ValueError:
+                delay = IGDB_RATE_LIMIT_BACKOFF * 2 ** attempt
+            delay = min(max(delay, 0.0), IGDB_RATE_LIMIT_MAX_BACKOFF)
+            app_logger.warning(f"IGDB rate limit hit, retrying in {delay:.2f}s", action="IGDB_RATE_LIMIT")
+            await asyncio.sleep(delay)
+        return resp
+
     async def _post_query(self, endpoint: str, query: str) -> List[Dict[str, Any]]:
         """
         Makes a POST request to /v4/{endpoint} with the IGDB query
@@ -91,7 +294,7 @@ class IgdbClient:
 
         start_time = time.perf_counter()
         try:
-            resp = await self.client.post(url, headers=headers, content=query)
+            resp = await self._post_with_backoff(url, headers, query)
             duration = time.perf_counter() - start_time
 
             app_logger.info(f"IGDB API call: {endpoint} - {resp.status_code} in {duration:.2f}s", action="IGDB_API_CALL")
@@ -100,26 +303,25 @@ class IgdbClient:
                 app_logger.error(f"IGDB API error: {endpoint} returned {resp.status_code}")
 
             resp.raise_for_status()
-            return resp.json()
+            return orjson.loads(resp.content)
 
         except httpx.HTTPStatusError as exc:
             # If auth failed (token expired/revoked), refresh token once and retry.
             if exc.response.status_code in (401, 403):
-                self.token = None
-                self.token_expires_at = None
+                await self._invalidate_token(token)
                 fresh_token = await self._get_access_token()
                 retry_headers = {
                     "Client-ID": IGDB_CLIENT_ID,
                     "Authorization": f"Bearer {fresh_token}",
                 }
-                retry_resp = await self.client.post(url, headers=retry_headers, content=query)
+                retry_resp = await self._post_with_backoff(url, retry_headers, query)
                 duration = time.perf_counter() - start_time
                 app_logger.info(
                     f"IGDB API retry: {endpoint} - {retry_resp.status_code} in {duration:.2f}s",
                     action="IGDB_API_CALL",
                 )
                 retry_resp.raise_for_status()
-                return retry_resp.json()
+                return orjson.loads(retry_resp.content)
 
             duration = time.perf_counter() - start_time
             app_logger.error(f"IGDB API HTTP error: {endpoint} failed after {duration:.2f}s - {exc}")
@@ -137,29 +339,97 @@ class IgdbClient:
         """
         Search games by name and return extended fields for GameCoverCard.
         Filters only PC games (platforms.slug = "win").
+        Results are cached in-process for a few minutes.
         """
-        igdb_query = f'''
-            search "{search_term}";
-            fields id, name, slug, first_release_date, cover.image_id, genres.name;
-            where cover != null & platforms.slug = "win";
-            limit {limit};
-        '''
-        raw_results = await self._post_query("games", igdb_query)
+        cached = self._get_cached_search(search_term, limit)
+        if cached is not None:
+            return cached
+
+        async def fetch():
+            raw_results = await self._post_query("games", _igdb_search_query(search_term, limit))
+            # Use the same transformation as other endpoints for consistency
+            return [transform_game_basic_info(game) for game in raw_results]
+
+        results = await self._cached_json(
+            self._search_redis_key(search_term, limit), IGDB_SEARCH_CACHE_TTL_SECONDS, fetch
+        )
+        self._set_cached_search(search_term, limit, results)
+        return results
+
+
+    async def search_games_multi(self, search_terms: List[str], limit: int = 10) -> List[List[Dict[str, Any]]]:
+        """
+        Run several game searches in one IGDB multiquery request (max 10 terms).
+        Returns one result list per search term, in the same order.
+        Terms found in the search cache are not sent to IGDB.
+        """
+        results: List[Optional[List[Dict[str, Any]]]] = [
+            self._get_cached_search(search_term, limit) for search_term in search_terms
+        ]
+        missing = [index for index, cached in enumerate(results) if cached is None]
+        if not missing:
+            return results
+
+        # Then the shared Redis cache, in one round-trip
+        redis = await self._get_redis()
+        if redis is not None:
+            try:
+                cached_values = await redis.mget([self._search_redis_key(search_terms[index], limit) for index in missing])
+                for index, cached in zip(missing, cached_values):
+                    if cached is not None:
+                        results[index] = orjson.loads(cached)
+                        self._set_cached_search(search_terms[index], limit, results[index])
+            except Exception as e:
+                app_logger.warning(f"IGDB search cache read failed: {str(e)}")
+            missing = [index for index in missing if results[index] is None]
+            if not missing:
+                return results
+
+        igdb_query = "".join(
+            f'query games "search_{index}" {{ {_igdb_search_query(search_terms[index], limit)} }};\n'
+            for index in missing
+        )
+        raw_results = await self._post_query("multiquery", igdb_query)
+        results_by_name = {entry.get("name"): entry.get("result") or [] for entry in raw_results}
         
-        # Use the same transformation as other endpoints for consistency
-        return [transform_game_basic_info(game) for game in raw_results]
+        for index in missing:
+            games = [transform_game_basic_info(game) for game in results_by_name.get(f"search_{index}", [])]
+            self._set_cached_search(search_terms[index], limit, games)
+            results[index] = games
+
+        if redis is not None:
+            try:
+                pipe = redis.pipeline()
+                for index in missing:
+                    pipe.set(
+                        self._search_redis_key(search_terms[index], limit),
+                        orjson.dumps(results[index]),
+                        ex=_cache_ttl(results[index], IGDB_SEARCH_CACHE_TTL_SECONDS)
+                    )
+                await pipe.execute()
+            except Exception as e:
+                app_logger.warning(f"IGDB search cache write failed: {str(e)}")
+        return results
 
 
     async def get_game_detail(self, game_id: int) -> Optional[Dict[str, Any]]:
         """
         Get all detail fields for a game (GameDetail) including similar games.
-        Filters only PC games (platforms.slug = "win").
+        Filters only PC games (platforms.slug = "win"). Cached in Redis.
         """
+        return await self._cached_json(
+            f"igdb:game:{game_id}", IGDB_DETAIL_CACHE_TTL_SECONDS,
+            lambda: self._fetch_game_detail(game_id)
+        )
+
+    async def _fetch_game_detail(self, game_id: int) -> Optional[Dict[str, Any]]:
         igdb_query = f'''
             fields id,name,slug,summary,storyline,first_release_date,rating,aggregated_rating,
                    genres.name,platforms.name,
                    cover.image_id,screenshots.image_id,videos.video_id,videos.name,
-                   similar_games,
+                   similar_games.name,similar_games.slug,similar_games.cover.image_id,
+                   similar_games.first_release_date,similar_games.total_rating_count,
+                   similar_games.genres.name,similar_games.platforms.slug,
                    involved_companies.company.id,
                    involved_companies.company.name,
                    involved_companies.company.slug,
@@ -175,19 +445,21 @@ class IgdbClient:
         
         game_data = raw_list[0]
         
-        # Resolve similar games using the existing function
+        # Similar games are expanded in the same query instead of a second round trip
         if game_data.get("similar_games"):
-            similar_game_ids = game_data["similar_games"][:12]  # Limit auf 12
+            similar_games = game_data["similar_games"][:12]  # Limit auf 12
             
-            # Create entries in the expected format for get_basic_game_info_from_entries
-            raw_entries = [{"game_id": gid} for gid in similar_game_ids]
-            
-            # Use the existing function (without rating filter for similar games)
-            similar_games_details = await self.get_basic_game_info_from_entries(
-                raw_entries, 
-                min_rating_count=0
-            )
+            similar_games_details = []
+            for similar in similar_games:
+                platform_slugs = {p.get("slug") for p in similar.get("platforms") or []}
+                if "win" in platform_slugs:
+                    similar_games_details.append(transform_game_basic_info(similar))
+                else:
+                    # Fallback-Stub for games without a PC release
+                    similar_games_details.append(game_stub(similar["id"]))
             
+            # Keep the plain ID list the endpoint returned before
+            game_data["similar_games"] = [similar["id"] for similar in game_data["similar_games"]]
             game_data["similar_games_details"] = similar_games_details
         
         return game_data
@@ -220,26 +492,23 @@ class IgdbClient:
           "details": {popularity_type_id: value, ...}
         }
         """
-        scores_temp: Dict[int, Dict[int, float]] = {}
+        scores_temp: Dict[int, Dict[int, float]] = defaultdict(dict)
         for entry in raw_entries:
-            gid = entry["game_id"]
-            ptype = entry["popularity_type"]
-            val = entry.get("value", 0.0) or 0.0
-            if gid not in scores_temp:
-                scores_temp[gid] = {}
-            scores_temp[gid][ptype] = val
+            scores_temp[entry["game_id"]][entry["popularity_type"]] = entry.get("value", 0.0) or 0.0
 
         result_list: List[Dict[str, Any]] = []
         for gid, type_dict in scores_temp.items():
+            # Types missing for a game add nothing, so only its own values are weighted
             weighted_score = 0.0
-            for ptype, weight in weight_map.items():
-                val = type_dict.get(ptype, 0.0)
-                weighted_score += weight * val
+            for ptype, val in type_dict.items():
+                weight = weight_map.get(ptype)
+                if weight:
+                    weighted_score += weight * val
 
             result_list.append({
                 "game_id": gid,
                 "weighted_score": weighted_score,
-                "details": type_dict.copy()
+                "details": type_dict
             })
 
         return result_list
@@ -256,7 +525,14 @@ class IgdbClient:
         Gets games of a certain genre (genre_id) for a certain platform (platform_slug),
         filters by minimum total_rating_count, sorts by rating DESC and returns maximum 'limit'.
         Returns only basic fields: id, name, slug, first_release_date, cover.image_id, rating, total_rating_count, genres.name
+        Cached in Redis.
         """
+        return await self._cached_json(
+            f"igdb:genre:{genre_id}:{min_rating_count}", IGDB_GENRE_CACHE_TTL_SECONDS,
+            lambda: self._fetch_games_by_genre(genre_id, min_rating_count)
+        )
+
+    async def _fetch_games_by_genre(self, genre_id: int, min_rating_count: int) -> List[Dict[str, Any]]:
         igdb_query = (
             "fields id,name,slug,first_release_date,cover.image_id,total_rating_count, genres.name;"
             f" where genres = ({genre_id})"
@@ -308,16 +584,12 @@ class IgdbClient:
         games = await self._post_query("games", query) or []
         lookup = {g["id"]: g for g in games}
 
-        # reassemble in the same order, flattening genres
-        result = []
-        for gid in game_ids:
-            raw = lookup.get(gid)
-            if not raw:
-                # Fallback-Stub
-                result.append(transform_game_basic_info({ "id": gid }))
-            else:
-                result.append(transform_game_basic_info(raw))
-        return result
+        # reassemble in the same order, flattening genres (Fallback-Stub for missing games)
+        lookup_get = lookup.get
+        return [
+            transform_game_basic_info(raw) if (raw := lookup_get(gid)) else game_stub(gid)
+            for gid in game_ids
+        ]
 
 
 
@@ -3,18 +3,111 @@ Application Logging Service
 
 Handles centralized logging for the GameRequest application with file rotation and management.
 """
+import atexit
+import collections
 import logging
 import os
-from datetime import datetime, timedelta
+import queue
+import re
+import orjson
+import threading
+import time
+from datetime import datetime
 from typing import List, Optional
-import glob
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 # Create logs directory
 LOGS_DIR = Path("logs")
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Buffered log file: flushed right away for warnings/errors, otherwise at least every interval
+LOG_FILE_BUFFER_SIZE = 64 * 1024
+LOG_FLUSH_INTERVAL_SECONDS = 1.0
+
+# timestamp - level - message, as written by the formatters below
+_LOG_LINE_RE = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - (\w+) - (.*)')
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that renders the date/time part of asctime once per second"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_second = -1
+        self._last_time = ""
+    
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._last_second:
+            self._last_time = time.strftime(self.default_time_format, self.converter(second))
+            self._last_second = second
+        return self.default_msec_format % (self._last_time, record.msecs)
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that buffers writes instead of flushing after every record"""
+    
+    def __init__(self, filename, buffer_size: int = LOG_FILE_BUFFER_SIZE, flush_level: int = logging.WARNING, **kwargs):
+        self.buffer_size = buffer_size
+        self.flush_level = flush_level
+        self._size = 0
+        super().__init__(filename, **kwargs)
+    
+    def _open(self):
+        stream = open(self.baseFilename, self.mode, buffering=self.buffer_size, encoding=self.encoding, errors=self.errors)
+        # Track the size ourselves, the stock rollover check seeks (and so flushes) on every record
+        stream.seek(0, os.SEEK_END)
+        self._size = stream.tell()
+        return stream
+    
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0 and self._size and self._size + len(msg) >= self.maxBytes:
+                self.doRollover()
+            self.stream.write(msg)
+            self._size += len(msg)
+            if record.levelno >= self.flush_level:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+# Entries kept in memory for the recent logs view
+RECENT_LOGS_BUFFER_SIZE = 1000
+
+class RecentLogsHandler(logging.Handler):
+    """Keeps the latest records as parsed log entries, like _read_log_file returns them"""
+    
+    def __init__(self, maxlen: int = RECENT_LOGS_BUFFER_SIZE):
+        super().__init__()
+        self.entries: "collections.deque[dict]" = collections.deque(maxlen=maxlen)
+    
+    def emit(self, record):
+        # Only the first line, like in the file where traceback lines aren't entries
+        message = record.getMessage().partition("\n")[0].rstrip()
+        timestamp = datetime.fromtimestamp(int(record.created)).replace(microsecond=int(record.msecs) * 1000)
+        self.entries.append({
+            'timestamp': timestamp,
+            'level': record.levelname,
+            'message': message,
+            'type': 'APPLICATION',
+            'formatted_time': (
+                f"{timestamp.day:02d}.{timestamp.month:02d}.{timestamp.year} "
+                f"{timestamp.hour:02d}:{timestamp.minute:02d}:{timestamp.second:02d}"
+            )
+        })
+    
+    def snapshot(self, lines: int) -> List[dict]:
+        """Latest `lines` entries, newest first"""
+        with self.lock:
+            entries = list(self.entries)
+        return entries[:-lines - 1:-1] if lines > 0 else []
+
 class AppLogger:
     def __init__(self):
         self.logger = logging.getLogger("GameRequest")
@@ -22,6 +115,11 @@ class AppLogger:
         self.enable_application_logs = True
         self.enable_error_logs = True
         self.enable_audit_logs = True
+        self._handlers: List[logging.Handler] = []
+        self._listener: Optional[QueueListener] = None
+        self._file_handler: Optional[BufferedRotatingFileHandler] = None
+        self._recent_logs: Optional[RecentLogsHandler] = None
+        self._flush_stop = threading.Event()
         
         # Prevent duplicate handlers
         if not self.logger.handlers:
@@ -31,26 +129,59 @@ class AppLogger:
         """Setup file handlers for different log types"""
         
         # Single log file for all messages
-        log_handler = RotatingFileHandler(
+        log_handler = BufferedRotatingFileHandler(
             LOGS_DIR / "application.log",
             maxBytes=10*1024*1024,  # 10MB
             backupCount=5
         )
         log_handler.setLevel(logging.INFO)
-        log_formatter = logging.Formatter(
+        log_formatter = CachedTimeFormatter(
             '%(asctime)s - %(levelname)s - %(message)s'
         )
         log_handler.setFormatter(log_formatter)
-        self.logger.addHandler(log_handler)
         
         # Console handler for development
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter(
+        console_formatter = CachedTimeFormatter(
             '%(asctime)s - %(levelname)s - %(message)s'
         )
         console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
+        
+        # Recent entries stay in memory, started with what the log file already has
+        recent_logs = RecentLogsHandler()
+        recent_logs.setLevel(logging.INFO)
+        app_log_path = LOGS_DIR / "application.log"
+        if app_log_path.exists():
+            recent_logs.entries.extend(self._read_log_file(app_log_path, "APPLICATION", RECENT_LOGS_BUFFER_SIZE))
+        self._recent_logs = recent_logs
+        
+        # Callers only enqueue records, a background thread does the file and console writes
+        log_queue = queue.SimpleQueue()
+        self._handlers = [log_handler, console_handler, recent_logs]
+        self._listener = QueueListener(log_queue, *self._handlers, respect_handler_level=True)
+        self._listener.start()
+        self._file_handler = log_handler
+        threading.Thread(target=self._flush_periodically, name="log-flush", daemon=True).start()
+        atexit.register(self.stop)
+        self.logger.addHandler(QueueHandler(log_queue))
+    
+    def _flush_periodically(self):
+        while not self._flush_stop.wait(LOG_FLUSH_INTERVAL_SECONDS):
+            self.flush()
+    
+    def flush(self):
+        """Write buffered log lines to the log file"""
+        if self._file_handler is not None:
+            self._file_handler.flush()
+    
+    def stop(self):
+        """Write out queued records and stop the background log threads"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        self._flush_stop.set()
+        self.flush()
 
     def apply_settings(self, settings):
         """Apply logging enable flags and level."""
@@ -60,41 +191,34 @@ class AppLogger:
         # Keep log level fixed at INFO to simplify configuration
         fixed_level = logging.INFO
         self.logger.setLevel(fixed_level)
-        for handler in self.logger.handlers:
+        # The QueueHandler passes everything on, the writing handlers filter
+        for handler in self._handlers:
             handler.setLevel(fixed_level)
     
+    @staticmethod
+    def _prefix(user_id: Optional[int], action: Optional[str]) -> str:
+        """'[action] [User id] ' prefix, empty for the common plain message"""
+        if not user_id and not action:
+            return ""
+        return (f"[{action}] " if action else "") + (f"[User {user_id}] " if user_id else "")
+    
     def info(self, message: str, user_id: Optional[int] = None, action: Optional[str] = None):
         """Log application activity"""
         if not self.enable_application_logs:
             return
-        log_message = message
-        if user_id:
-            log_message = f"[User {user_id}] {message}"
-        if action:
-            log_message = f"[{action}] {log_message}"
-        self.logger.info(log_message)
+        self.logger.info("%s%s", self._prefix(user_id, action), message)
     
     def error(self, message: str, exc_info=True, user_id: Optional[int] = None, action: Optional[str] = None):
         """Log errors"""
         if not self.enable_error_logs:
             return
-        log_message = message
-        if user_id:
-            log_message = f"[User {user_id}] {message}"
-        if action:
-            log_message = f"[{action}] {log_message}"
-        self.logger.error(log_message, exc_info=exc_info)
+        self.logger.error("%s%s", self._prefix(user_id, action), message, exc_info=exc_info)
     
     def warning(self, message: str, user_id: Optional[int] = None, action: Optional[str] = None):
         """Log warnings"""
         if not self.enable_application_logs:
             return
-        log_message = message
-        if user_id:
-            log_message = f"[User {user_id}] {message}"
-        if action:
-            log_message = f"[{action}] {log_message}"
-        self.logger.warning(log_message)
+        self.logger.warning("%s%s", self._prefix(user_id, action), message)
     
     def audit(self, action: str, user_id: int, details: str = "", **kwargs):
         """Log audit trail for important actions"""
@@ -105,8 +229,7 @@ class AppLogger:
             message += f" - {details}"
         # Add any additional details from kwargs
         if kwargs:
-            import json
-            message += f" - Additional data: {json.dumps(kwargs)}"
+            message += f" - Additional data: {orjson.dumps(kwargs, default=str).decode()}"
         self.logger.info(f"[AUDIT] {message}")
     
     async def cleanup_old_logs(self):
@@ -117,35 +240,40 @@ class AppLogger:
             settings = await SettingsService.get_settings()
             retention_days = settings.logRetentionDays
             
-            cutoff_date = datetime.now() - timedelta(days=retention_days)
-            
-            # Find all log files
-            log_files = glob.glob(str(LOGS_DIR / "*.log*"))
+            cutoff_ts = time.time() - retention_days * 86400
             
-            for log_file in log_files:
-                file_path = Path(log_file)
-                if file_path.stat().st_mtime < cutoff_date.timestamp():
-                    try:
-                        os.remove(log_file)
-                        self.info(f"Deleted old log file: {file_path.name}")
-                    except Exception as e:
-                        self.error(f"Failed to delete log file {file_path.name}: {str(e)}")
+            # Find all log files (*.log*), one directory scan instead of glob plus a stat per file
+            with os.scandir(LOGS_DIR) as entries:
+                for entry in entries:
+                    if ".log" not in entry.name or entry.name.startswith(".") or not entry.is_file():
+                        continue
+                    if entry.stat().st_mtime < cutoff_ts:
+                        try:
+                            os.remove(entry.path)
+                            self.info(f"Deleted old log file: {entry.name}")
+                        except Exception as e:
+                            self.error(f"Failed to delete log file {entry.name}: {str(e)}")
                         
         except Exception as e:
             self.error(f"Log cleanup failed: {str(e)}")
     
     def get_recent_logs(self, lines: int = 100) -> List[dict]:
-        """Get recent log entries from log file"""
+        """Get recent log entries, from memory or for larger requests from the log file"""
         logs = []
         
         try:
-            # Read from application.log only
-            app_log_path = LOGS_DIR / "application.log"
-            if app_log_path.exists():
-                logs.extend(self._read_log_file(app_log_path, "APPLICATION", lines))
-            
-            # Sort by timestamp (newest first)
-            logs.sort(key=lambda x: x['timestamp'], reverse=True)
+            if self._recent_logs is not None and lines <= RECENT_LOGS_BUFFER_SIZE:
+                # Already newest first
+                logs = self._recent_logs.snapshot(lines)
+            else:
+                # Read from application.log only, including lines still in the write buffer
+                self.flush()
+                app_log_path = LOGS_DIR / "application.log"
+                if app_log_path.exists():
+                    logs.extend(self._read_log_file(app_log_path, "APPLICATION", lines))
+                
+                # Sort by timestamp (newest first)
+                logs.sort(key=lambda x: x['timestamp'], reverse=True)
             # Normalize datetimes to ISO strings for JSON responses
             normalized = []
             for entry in logs[:lines]:
@@ -165,52 +293,92 @@ class AppLogger:
         logs = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
             # Get last max_lines
-            recent_lines = lines[-max_lines:] if len(lines) > max_lines else lines
+            recent_lines = self._tail_lines(file_path, max_lines)
             
             for line in recent_lines:
                 line = line.strip()
                 if not line:
                     continue
                 
+                # Parse log line format: timestamp - level - message
+                match = _LOG_LINE_RE.match(line)
+                if match is None:
+                    # Continuation lines (e.g. tracebacks) are skipped, other lines kept raw
+                    if line.count(' - ') >= 2:
+                        logs.append(self._raw_log_entry(line, log_type))
+                    continue
+                
+                timestamp_str, level, message = match.groups()
                 try:
-                    # Parse log line format: timestamp - level - message
-                    parts = line.split(' - ', 2)
-                    if len(parts) >= 3:
-                        timestamp_str = parts[0]
-                        level = parts[1]
-                        message = parts[2]
-                        
-                        # Parse timestamp
-                        timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S,%f')
-                        
-                        logs.append({
-                            'timestamp': timestamp,
-                            'level': level,
-                            'message': message,
-                            'type': log_type,
-                            'formatted_time': timestamp.strftime('%d.%m.%Y %H:%M:%S')
-                        })
-                except Exception:
+                    # Parse timestamp
+                    timestamp = self._parse_log_timestamp(timestamp_str)
+                except ValueError:
                     # If parsing fails, add as raw entry
-                    logs.append({
-                        'timestamp': datetime.now(),
-                        'level': 'INFO',
-                        'message': line,
-                        'type': log_type,
-                        'formatted_time': datetime.now().strftime('%d.%m.%Y %H:%M:%S')
-                    })
+                    logs.append(self._raw_log_entry(line, log_type))
+                    continue
+                
+                logs.append({
+                    'timestamp': timestamp,
+                    'level': level,
+                    'message': message,
+                    'type': log_type,
+                    'formatted_time': (
+                        f"{timestamp.day:02d}.{timestamp.month:02d}.{timestamp.year} "
+                        f"{timestamp.hour:02d}:{timestamp.minute:02d}:{timestamp.second:02d}"
+                    )
+                })
                     
         except Exception as e:
             self.error(f"Failed to read log file {file_path}: {str(e)}")
             
         return logs
     
+    @staticmethod
+    def _raw_log_entry(line: str, log_type: str) -> dict:
+        """Entry for a line that isn't in the log record format"""
+        now = datetime.now()
+        return {
+            'timestamp': now,
+            'level': 'INFO',
+            'message': line,
+            'type': log_type,
+            'formatted_time': now.strftime('%d.%m.%Y %H:%M:%S')
+        }
+    
+    @staticmethod
+    def _parse_log_timestamp(timestamp_str: str) -> datetime:
+        """Parse 'YYYY-MM-DD HH:MM:SS,mmm' by slicing, strptime is only the fallback"""
+        if len(timestamp_str) == 23:
+            return datetime(
+                int(timestamp_str[0:4]), int(timestamp_str[5:7]), int(timestamp_str[8:10]),
+                int(timestamp_str[11:13]), int(timestamp_str[14:16]), int(timestamp_str[17:19]),
+                int(timestamp_str[20:23]) * 1000
+            )
+        return datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S,%f')
+    
+    @staticmethod
+    def _tail_lines(file_path: Path, max_lines: int, block_size: int = 8192) -> List[str]:
+        """Read the last max_lines lines by seeking backwards from the end of the file"""
+        if max_lines <= 0:
+            return []
+        
+        with open(file_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            buffer = b''
+            # One newline more than needed guarantees the first kept line is complete
+            while position > 0 and buffer.count(b'\n') <= max_lines:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                buffer = f.read(read_size) + buffer
+        
+        return [line.decode('utf-8', errors='replace') for line in buffer.splitlines()[-max_lines:]]
+    
     def get_log_file_path(self) -> Optional[Path]:
         """Get path to log file for download"""
+        self.flush()
         return LOGS_DIR / "application.log"
 
 # Global logger instance
@@ -1,10 +1,11 @@
 import asyncio
-from datetime import datetime, timedelta
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, List, Optional
 from .redis_client import get_redis
-import json
+import orjson
 from .igdb_client import igdb_client
 from .cache_layer import get_cached_raw_primitives
+from .logging_service import app_logger
 
 # Popularity type weighting configurations
 WEIGHTS = {
@@ -12,12 +13,48 @@ WEIGHTS = {
     "custom_top100":  {2: 0.20, 3: 0.40, 4: 0.40},
 }
 
+CACHE_TTL_SECONDS = 86400
+
+
+def queue_game_list(pipe, cache_key: str, games: List[Dict[str, Any]]) -> None:
+    """
+    Queue the commands storing games as a Redis list of individually serialized
+    items on a pipeline, so cache hits can be sliced with LRANGE without
+    decoding the whole list.
+    """
+    pipe.delete(cache_key)
+    if games:
+        pipe.rpush(cache_key, *[orjson.dumps(game) for game in games])
+        pipe.expire(cache_key, CACHE_TTL_SECONDS)
+
+
+async def cache_game_list(redis, cache_key: str, games: List[Dict[str, Any]]) -> None:
+    """
+    Store games as a Redis list (see queue_game_list) in one round trip.
+    """
+    pipe = redis.pipeline()
+    queue_game_list(pipe, cache_key, games)
+    await pipe.execute()
+
+
+async def get_cached_game_list_json(cache_key: str, limit: int) -> Optional[str]:
+    """
+    Return the first `limit` cached games as a ready-to-send JSON array,
+    or None on a cache miss.
+    """
+    redis = await get_redis()
+    items = await redis.lrange(cache_key, 0, limit - 1)
+    if not items:
+        return None
+    return "[" + ",".join(items) + "]"
+
 
 async def compute_and_cache(
     cache_key: str,
     types: list[int],
     weight_map: dict[int, float],
-    min_rating_count: int
+    min_rating_count: int,
+    pipe=None
 ) -> list[dict]:
     """
     Compute weighted scores for games and cache the result.
@@ -27,9 +64,9 @@ async def compute_and_cache(
     3. Fetch basic game info
     4. Combine scores with game info
     5. Cache and return
+    
+    With a pipeline the cache write is only queued, the caller executes it.
     """
-    redis = await get_redis()
-
     # Fetch raw popularity data
     raw = await get_cached_raw_primitives(types, limit=500)
 
@@ -39,50 +76,59 @@ async def compute_and_cache(
 
     # Fetch basic game information
     basic = await igdb_client.get_basic_game_info_from_entries(scored, min_rating_count)
-    lookup = {g["id"]: g for g in basic}
-
-    # Combine scores with game information
-    combined = []
-    for entry in scored:
-        game = lookup.get(entry["game_id"])
-        # Skip entries without game data or missing name
-        if not game or not game.get("name"):
-            continue
-        game["weighted_score"] = entry["weighted_score"]
-        combined.append(game)
+
+    # Combine scores with game information; basic keeps the score order.
+    # Skip entries without game data or missing name (stubs)
+    scores = {entry["game_id"]: entry["weighted_score"] for entry in scored}
+    combined = [
+        {**game, "weighted_score": scores[game["id"]]}
+        for game in basic
+        if game.get("name")
+    ]
 
     # Cache and return
-    await redis.set(cache_key, json.dumps(combined), ex=86400)
+    if pipe is not None:
+        queue_game_list(pipe, cache_key, combined)
+    else:
+        await cache_game_list(await get_redis(), cache_key, combined)
     return combined
 
 
-async def refresh_popular_recent(limit: int = 20) -> List[Dict[str, Any]]:
+async def refresh_popular_recent(limit: int = 20, pipe=None) -> List[Dict[str, Any]]:
     """
     Fetch popular games from the last 12 months with weighted scores.
+    Both cache writes go out in one pipeline (the caller's, if given).
     """
-    lower_bound = int((datetime.utcnow() - timedelta(days=365)).timestamp())
-    upper_bound = int(datetime.utcnow().timestamp())
+    own_pipe = pipe is None
+    if own_pipe:
+        pipe = (await get_redis()).pipeline()
+
+    # IGDB release dates are Unix timestamps
+    upper_bound = int(time.time())
+    lower_bound = upper_bound - 365 * 86400
 
     cached_games = await compute_and_cache(
         cache_key="popular_recent_full",
         types=[1, 2, 3],
         weight_map=WEIGHTS["popular_recent"],
-        min_rating_count=3
+        min_rating_count=3,
+        pipe=pipe
     )
 
     # Filter by release date (include games without dates)
     recent_games = [
         game for game in cached_games
-        if not game.get("first_release_date")
-        or (lower_bound <= game["first_release_date"] <= upper_bound)
+        if not (release_date := game.get("first_release_date"))
+        or lower_bound <= release_date <= upper_bound
     ]
 
-    redis = await get_redis()
-    await redis.set("popular_recent", json.dumps(recent_games), ex=86400)
+    queue_game_list(pipe, "popular_recent", recent_games)
+    if own_pipe:
+        await pipe.execute()
 
     return recent_games[:limit]
 
-async def refresh_custom_top100(limit: int = 100) -> List[Dict[str, Any]]:
+async def refresh_custom_top100(limit: int = 100, pipe=None) -> List[Dict[str, Any]]:
     """
     Fetch top 100 games based on custom popularity weights.
     """
@@ -90,12 +136,13 @@ async def refresh_custom_top100(limit: int = 100) -> List[Dict[str, Any]]:
         cache_key="custom_top100",
         types=[2, 3, 4],
         weight_map=WEIGHTS["custom_top100"],
-        min_rating_count=0
+        min_rating_count=0,
+        pipe=pipe
     )
     return games[:limit]
 
 
-async def refresh_popular_by_type(pop_type: int = 5, limit: int = 20) -> List[Dict[str, Any]]:
+async def refresh_popular_by_type(pop_type: int = 5, limit: int = 20, pipe=None) -> List[Dict[str, Any]]:
     """
     Fetch popular games by a specific popularity type (e.g., type 5 = 24h peak).
     """
@@ -104,7 +151,8 @@ async def refresh_popular_by_type(pop_type: int = 5, limit: int = 20) -> List[Di
         cache_key=cache_key,
         types=[pop_type],
         weight_map={pop_type: 1.0},
-        min_rating_count=0
+        min_rating_count=0,
+        pipe=pipe
     )
     return games[:limit]
 
@@ -122,7 +170,7 @@ async def refresh_genre_list(
 
     # Try cache first
     if (data := await redis.get(cache_key)):
-        games = json.loads(data)
+        games = orjson.loads(data)
         return games[:limit]
 
     # Cache miss: fetch from IGDB
@@ -132,7 +180,7 @@ async def refresh_genre_list(
     )
 
     # Cache and return
-    await redis.set(cache_key, json.dumps(raw_list), ex=86400)
+    await redis.set(cache_key, orjson.dumps(raw_list), ex=86400)
     return raw_list[:limit]
 
 
@@ -141,9 +189,21 @@ async def refresh_all_popularities():
     """
     Refresh all popularity caches in parallel.
     This is called during application startup.
+    All cache writes are sent together in one pipeline at the end;
+    a failed refresh doesn't keep the others from being cached.
     """
-    await asyncio.gather(
-        refresh_popular_recent(),
-        refresh_custom_top100(),
-        refresh_popular_by_type(5, 20),
-    )
+    redis = await get_redis()
+    # MULTI/EXEC like cache_game_list, readers never see a half replaced list
+    pipe = redis.pipeline()
+    refreshes = {
+        "popular_recent": refresh_popular_recent(pipe=pipe),
+        "custom_top100": refresh_custom_top100(pipe=pipe),
+        "popular_by_type": refresh_popular_by_type(5, 20, pipe=pipe),
+    }
+    results = await asyncio.gather(*refreshes.values(), return_exceptions=True)
+    for name, result in zip(refreshes, results):
+        if isinstance(result, BaseException):
+            app_logger.error(
+                f"Popularity refresh '{name}' failed: {result}", exc_info=result, action="POPULARITY_REFRESH_ERROR"
+            )
+    await pipe.execute()
@@ -4,8 +4,23 @@ import redis.asyncio as redis
 from services.logging_service import app_logger
 
 redis_instance: redis.Redis | None = None
+_redis_init_lock = asyncio.Lock()
+
+# Upper bound for the client's connection pool (shared by all requests of this worker)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+# A degraded Redis should fail fast instead of stalling requests, everything falls back on errors
+REDIS_SOCKET_TIMEOUT = 2
+# Idle pooled connections are checked before reuse after this many seconds
+REDIS_HEALTH_CHECK_INTERVAL = 30
 
 async def get_redis() -> redis.Redis:
+    if redis_instance is not None:
+        return redis_instance
+    async with _redis_init_lock:
+        # Concurrent first callers wait here instead of each building a client and pool
+        return await _connect_redis()
+
+async def _connect_redis() -> redis.Redis:
     global redis_instance
     if redis_instance is None:
         try:
@@ -25,7 +40,13 @@ async def get_redis() -> redis.Redis:
             # build the asynchronous client
             redis_instance = redis.from_url(
                 redis_url, 
-                decode_responses=True
+                decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_keepalive=True,
+                health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+                retry_on_timeout=True
             )
             # Test connection
             await redis_instance.ping()
@@ -10,30 +10,35 @@ from services.logging_service import app_logger
 import json
 
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-        
-        # Endpoints to exclude from logging (to avoid spam)
-        self.exclude_paths = {
-            "/health",
-            "/api/logs/recent",  # Don't log the logs endpoint itself
-            "/docs",
-            "/openapi.json",
-            "/favicon.ico"
-        }
+    # Endpoints to exclude from logging (to avoid spam)
+    EXCLUDE_PATHS = frozenset({
+        "/health",
+        "/api/logs/recent",  # Don't log the logs endpoint itself
+        "/docs",
+        "/openapi.json",
+        "/favicon.ico"
+    })
     
     async def dispatch(self, request: Request, call_next):
-        # Skip logging for excluded paths
-        if request.url.path in self.exclude_paths:
+        # Skip logging for excluded paths (with or without trailing slash)
+        path = request.url.path
+        if path in self.EXCLUDE_PATHS or path.rstrip("/") in self.EXCLUDE_PATHS:
+            return await call_next(request)
+        
+        # Nothing below would be written, skip the token check and message building
+        log_requests = app_logger.enable_application_logs
+        if not log_requests and not app_logger.enable_error_logs:
             return await call_next(request)
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # Extract request info
         client_ip = request.client.host if request.client else "unknown"
         user_agent = request.headers.get("user-agent", "unknown")
         method = request.method
-        url = str(request.url)
+        # Path and query are enough to identify the request, the host is always this app
+        query = request.url.query
+        url = f"{path}?{query}" if query else path
         
         # Get user info from token if available
         user_info = "anonymous"
@@ -49,26 +54,28 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 pass
         
         # Log request start
-        app_logger.info(
-            f"HTTP {method} {url} - {user_info} from {client_ip}",
-            action="HTTP_REQUEST"
-        )
+        if log_requests:
+            app_logger.info(
+                f"HTTP {method} {url} - {user_info} from {client_ip}",
+                action="HTTP_REQUEST"
+            )
         
         # Process request
         try:
             response = await call_next(request)
             
             # Calculate response time
-            process_time = time.time() - start_time
+            process_time = time.perf_counter() - start_time
             
-            # Log successful response
-            app_logger.info(
-                f"HTTP {method} {url} - {response.status_code} in {process_time:.3f}s - {user_info}",
-                action="HTTP_RESPONSE"
-            )
+            # Log successful response (the queue handler keeps file IO off this path)
+            if log_requests:
+                app_logger.info(
+                    f"HTTP {method} {url} - {response.status_code} in {process_time:.3f}s - {user_info}",
+                    action="HTTP_RESPONSE"
+                )
             
             # Log slow requests (>2 seconds)
-            if process_time > 2.0:
+            if log_requests and process_time > 2.0:
                 app_logger.warning(
                     f"SLOW REQUEST: {method} {url} took {process_time:.3f}s - {user_info}"
                 )
@@ -77,7 +84,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
             
         except Exception as e:
             # Log failed requests
-            process_time = time.time() - start_time
+            process_time = time.perf_counter() - start_time
             app_logger.error(
                 f"HTTP {method} {url} - ERROR after {process_time:.3f}s: {str(e)} - {user_info}",
                 action="HTTP_ERROR"
@@ -1,28 +1,70 @@
-from sqlalchemy import select, desc, func
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+import orjson
+from sqlalchemy import and_, case, delete, select, desc, exists, func, lambda_stmt, update
+from sqlalchemy.orm import joinedload
+from typing import Dict, List, Optional, Union
 from models.database import GameRequestDB, RequestStatus, UserDB, AsyncSessionLocal
-from models.request import GameRequestCreate, GameRequestUpdate, GameRequestWithUser
+from models.request import GameRequest, GameRequestCreate, GameRequestUpdate, GameRequestWithUser, GAME_REQUEST_WITH_USER_LIST
 from services.settings_service import SettingsService
 from services.telegram_service import telegram_service
 from services.logging_service import app_logger
+from services.redis_client import get_redis
+
+# Per-game status/availability answers are cached briefly in a Redis hash
+GAME_STATUS_CACHE_TTL_SECONDS = 60
+
+def _game_status_cache_key(igdb_id: int) -> str:
+    return f"game_status:{igdb_id}"
 
 class RequestService:
     
+    @staticmethod
+    async def _get_cached_game_status(igdb_id: int, field: str) -> Optional[str]:
+        try:
+            redis = await get_redis()
+            return await redis.hget(_game_status_cache_key(igdb_id), field)
+        except Exception as e:
+            app_logger.warning(f"Game status cache read failed for {igdb_id}: {str(e)}")
+            return None
+    
+    @staticmethod
+    async def _set_cached_game_status(igdb_id: int, field: str, value: Union[str, bytes]) -> None:
+        try:
+            redis = await get_redis()
+            key = _game_status_cache_key(igdb_id)
+            pipe = redis.pipeline()
+            pipe.hset(key, field, value)
+            # TTL is only set by the first write, so no field outlives it
+            pipe.expire(key, GAME_STATUS_CACHE_TTL_SECONDS, nx=True)
+            await pipe.execute()
+        except Exception as e:
+            app_logger.warning(f"Game status cache write failed for {igdb_id}: {str(e)}")
+    
+    @staticmethod
+    async def invalidate_game_status_cache(*igdb_ids: Optional[int]) -> None:
+        """Drop cached status/availability of the given games after their requests changed"""
+        keys = {_game_status_cache_key(igdb_id) for igdb_id in igdb_ids if igdb_id is not None}
+        if not keys:
+            return
+        try:
+            redis = await get_redis()
+            await redis.delete(*keys)
+        except Exception as e:
+            app_logger.warning(f"Game status cache invalidation failed: {str(e)}")
+    
     @staticmethod
     async def create_request(request: GameRequestCreate, user_id: int) -> GameRequestDB:
-        # Check if user can create request based on settings
-        can_create = await SettingsService.can_user_create_request(user_id)
-        if not can_create:
-            settings = await SettingsService.get_settings()
-            app_logger.warning(
-                f"Request creation blocked: User {user_id} exceeded limit of {settings.maxRequestsPerUser}",
-                user_id=user_id,
-                action="REQUEST_BLOCKED"
-            )
-            raise ValueError(f"Maximum number of requests reached. Limit: {settings.maxRequestsPerUser}")
-        
         async with AsyncSessionLocal() as session:
+            # Check if user can create request based on settings, on the same connection
+            can_create = await SettingsService.can_user_create_request(user_id, session)
+            if not can_create:
+                settings = await SettingsService.get_settings()
+                app_logger.warning(
+                    f"Request creation blocked: User {user_id} exceeded limit of {settings.maxRequestsPerUser}",
+                    user_id=user_id,
+                    action="REQUEST_BLOCKED"
+                )
+                raise ValueError(f"Maximum number of requests reached. Limit: {settings.maxRequestsPerUser}")
+            
             # Get user and settings to check approval logic
             user_query = select(UserDB).where(UserDB.id == user_id)
             user_result = await session.execute(user_query)
@@ -41,13 +83,14 @@ class RequestService:
                 initial_status = RequestStatus.APPROVED
             
             db_request = GameRequestDB(
-                **request.dict(),
+                **request.model_dump(),
                 requester_id=user_id,
                 status=initial_status
             )
             session.add(db_request)
             await session.commit()
-            await session.refresh(db_request)
+            # id and server timestamps come back with the INSERT (eager_defaults)
+            await RequestService.invalidate_game_status_cache(db_request.igdb_id)
             
             # Log request creation
             app_logger.info(
@@ -59,29 +102,18 @@ class RequestService:
             # Send Telegram notification for new request
             try:
                 # Create GameRequest object for notification
-                from models.request import GameRequest
-                request_for_notification = GameRequest(
-                    id=db_request.id,
-                    game_name=db_request.game_name,
-                    igdb_id=db_request.igdb_id,
-                    igdb_cover_url=db_request.igdb_cover_url,
-                    igdb_genres=db_request.igdb_genres,
-                    comment=db_request.comment,
-                    status=db_request.status,
-                    admin_notes=db_request.admin_notes,
-                    created_at=db_request.created_at,
-                    updated_at=db_request.updated_at,
-                    requester_id=db_request.requester_id
-                )
+                request_for_notification = GameRequest.model_validate(db_request)
                 
-                await telegram_service.notify_new_request(
-                    request_for_notification,
-                    user.username if user else 'Unbekannt'
+                telegram_service.send_in_background(
+                    telegram_service.notify_new_request(
+                        request_for_notification,
+                        user.username if user else 'Unbekannt'
+                    ),
+                    "new request"
                 )
             except Exception as e:
                 # Don't fail request creation if notification fails
                 app_logger.error(f"Failed to send Telegram notification for new request: {str(e)}", user_id=user_id)
-                print(f"Failed to send Telegram notification: {e}")
             
             return db_request
     
@@ -89,7 +121,9 @@ class RequestService:
     async def get_request(request_id: int) -> Optional[GameRequestDB]:
         """Get single request by ID"""
         async with AsyncSessionLocal() as session:
-            query = select(GameRequestDB).options(selectinload(GameRequestDB.requester)).where(GameRequestDB.id == request_id)
+            query = lambda_stmt(
+                lambda: select(GameRequestDB).options(joinedload(GameRequestDB.requester)).where(GameRequestDB.id == request_id)
+            )
             result = await session.execute(query)
             return result.scalar_one_or_none()
     
@@ -101,82 +135,76 @@ class RequestService:
         limit: int = 100
     ) -> List[GameRequestDB]:
         async with AsyncSessionLocal() as session:
-            query = select(GameRequestDB).options(selectinload(GameRequestDB.requester))
+            # lambda_stmt caches the statement construction per filter combination,
+            # the filter values are passed as bound parameters.
+            # requester is many-to-one, so a JOIN loads the page in one query without multiplying rows;
+            # only the columns of UserSummary are selected from users
+            query = lambda_stmt(lambda: select(GameRequestDB).options(
+                joinedload(GameRequestDB.requester).load_only(UserDB.id, UserDB.username)
+            ))
             
             if status:
-                query = query.where(GameRequestDB.status == status)
+                query += lambda s: s.where(GameRequestDB.status == status)
             
             if user_id:
-                query = query.where(GameRequestDB.requester_id == user_id)
+                query += lambda s: s.where(GameRequestDB.requester_id == user_id)
                 
-            query = query.order_by(desc(GameRequestDB.created_at)).offset(skip).limit(limit)
+            # SQLite timestamps have second resolution, the id keeps same-second requests newest first
+            query += lambda s: s.order_by(
+                desc(GameRequestDB.created_at), desc(GameRequestDB.id)
+            ).offset(skip).limit(limit)
             result = await session.execute(query)
             return result.scalars().all()
     
     @staticmethod
     def to_response_model(db_request: GameRequestDB) -> GameRequestWithUser:
         """Convert DB model to response model with user info"""
-        from models.user_models import UserSummary
-        
-        # Create user summary if requester exists
-        user_summary = None
-        if db_request.requester:
-            user_summary = UserSummary(
-                id=db_request.requester.id,
-                username=db_request.requester.username,
-                full_name=db_request.requester.username  # Use username as full_name fallback
-            )
-        
-        return GameRequestWithUser(
-            id=db_request.id,
-            game_name=db_request.game_name,
-            igdb_id=db_request.igdb_id,
-            igdb_cover_url=db_request.igdb_cover_url,
-            igdb_genres=db_request.igdb_genres,
-            comment=db_request.comment,
-            status=db_request.status,
-            created_at=db_request.created_at,
-            updated_at=db_request.updated_at,
-            admin_notes=db_request.admin_notes,
-            requester_id=db_request.requester_id,
-            user=user_summary
-        )
+        return GameRequestWithUser.model_validate(db_request)
+    
+    @staticmethod
+    def to_response_models(db_requests: List[GameRequestDB]) -> List[GameRequestWithUser]:
+        """Convert a list of DB models to response models in one validation pass"""
+        return GAME_REQUEST_WITH_USER_LIST.validate_python(db_requests)
     
     @staticmethod
     async def update_request(
         request_id: int, 
         request_update: GameRequestUpdate
     ) -> Optional[GameRequestDB]:
+        update_data = request_update.model_dump(exclude_unset=True)
+        if not update_data:
+            return await RequestService.get_request(request_id)
+        
         async with AsyncSessionLocal() as session:
-            # Get request
-            query = select(GameRequestDB).where(GameRequestDB.id == request_id)
+            # Update fields and read the updated row back in one statement
+            query = (
+                update(GameRequestDB)
+                .where(GameRequestDB.id == request_id)
+                .values(**update_data)
+                .returning(GameRequestDB)
+            )
             result = await session.execute(query)
             db_request = result.scalar_one_or_none()
             
             if not db_request:
                 return None
-                
-            # Update fields
-            update_data = request_update.dict(exclude_unset=True)
-            for field, value in update_data.items():
-                setattr(db_request, field, value)
             
             await session.commit()
-            await session.refresh(db_request)
+            await RequestService.invalidate_game_status_cache(db_request.igdb_id)
             return db_request
     
     @staticmethod
     async def delete_request(request_id: int) -> bool:
         async with AsyncSessionLocal() as session:
-            query = select(GameRequestDB).where(GameRequestDB.id == request_id)
+            query = delete(GameRequestDB).where(GameRequestDB.id == request_id).returning(GameRequestDB.igdb_id)
             result = await session.execute(query)
-            db_request = result.scalar_one_or_none()
+            deleted = result.first()
             
-            if not db_request:
+            if not deleted:
                 return False
                 
-            await session.delete(db_request)
             await session.commit()
+            await RequestService.invalidate_game_status_cache(deleted.igdb_id)
             return True
     
     @staticmethod
@@ -195,14 +223,14 @@ class RequestService:
     @staticmethod
     async def get_requests_count_by_status(session, user_id: Optional[int] = None) -> dict:
         """Get count of requests grouped by status - ASYNC VERSION"""
-        counts = {}
-        for status in RequestStatus:
-            query = select(func.count(GameRequestDB.id)).where(GameRequestDB.status == status)
-            if user_id:
-                query = query.where(GameRequestDB.requester_id == user_id)
-            
-            result = await session.execute(query)
-            count = result.scalar()
+        query = select(GameRequestDB.status, func.count(GameRequestDB.id)).group_by(GameRequestDB.status)
+        if user_id:
+            query = query.where(GameRequestDB.requester_id == user_id)
+        
+        result = await session.execute(query)
+        # Statuses without requests don't come back from the GROUP BY
+        counts = {status.value: 0 for status in RequestStatus}
+        for status, count in result.all():
             counts[status.value] = count
         return counts
     
@@ -210,69 +238,139 @@ class RequestService:
     async def mark_request_as_available(request_id: int, admin_id: int) -> Optional[GameRequestDB]:
         """Admin marks request as available (installed)"""
         async with AsyncSessionLocal() as session:
-            # Get request with requester info
-            query = select(GameRequestDB).options(selectinload(GameRequestDB.requester)).where(GameRequestDB.id == request_id)
+            # Update and read back the request with requester info
+            query = (
+                update(GameRequestDB)
+                .where(GameRequestDB.id == request_id)
+                .values(
+                    status=RequestStatus.COMPLETED,
+                    admin_notes=f"Game was installed and is available (Admin ID: {admin_id})"
+                )
+                .returning(GameRequestDB)
+            )
             result = await session.execute(query)
             request = result.scalar_one_or_none()
             
             if not request:
                 return None
                 
-            request.status = RequestStatus.COMPLETED
-            request.admin_notes = f"Game was installed and is available (Admin ID: {admin_id})"
             await session.commit()
-            await session.refresh(request)
+            await RequestService.invalidate_game_status_cache(request.igdb_id)
             return request
     
     @staticmethod
     async def is_game_available(igdb_id: int) -> bool:
         """Check if game is already available (COMPLETED request exists)"""
+        cached = await RequestService._get_cached_game_status(igdb_id, "available")
+        if cached is not None:
+            return cached == "1"
+        
         async with AsyncSessionLocal() as session:
-            query = select(GameRequestDB).where(
+            # Built once and cached by lambda_stmt, igdb_id is passed as a bound parameter
+            query = lambda_stmt(lambda: select(exists().where(
                 GameRequestDB.igdb_id == igdb_id,
                 GameRequestDB.status == RequestStatus.COMPLETED
-            )
+            )))
             result = await session.execute(query)
-            return result.first() is not None
+            is_available = bool(result.scalar())
+        
+        await RequestService._set_cached_game_status(igdb_id, "available", "1" if is_available else "0")
+        return is_available
+    
+    @staticmethod
+    async def get_games_availability(igdb_ids: List[int]) -> Dict[int, bool]:
+        """Availability of many games at once: one Redis round-trip plus one IN query for misses"""
+        igdb_ids = list(dict.fromkeys(igdb_ids))
+        availability: Dict[int, bool] = {}
+        if not igdb_ids:
+            return availability
+        
+        try:
+            redis = await get_redis()
+            pipe = redis.pipeline()
+            for igdb_id in igdb_ids:
+                pipe.hget(_game_status_cache_key(igdb_id), "available")
+            cached_values = await pipe.execute()
+        except Exception as e:
+            app_logger.warning(f"Game status cache batch read failed: {str(e)}")
+            cached_values = [None] * len(igdb_ids)
+        
+        missing_ids = []
+        for igdb_id, cached in zip(igdb_ids, cached_values):
+            if cached is None:
+                missing_ids.append(igdb_id)
+            else:
+                availability[igdb_id] = cached == "1"
+        
+        if missing_ids:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(GameRequestDB.igdb_id).distinct().where(
+                        GameRequestDB.igdb_id.in_(missing_ids),
+                        GameRequestDB.status == RequestStatus.COMPLETED
+                    )
+                )
+                available_ids = set(result.scalars())
+            
+            try:
+                redis = await get_redis()
+                pipe = redis.pipeline()
+                for igdb_id in missing_ids:
+                    key = _game_status_cache_key(igdb_id)
+                    pipe.hset(key, "available", "1" if igdb_id in available_ids else "0")
+                    pipe.expire(key, GAME_STATUS_CACHE_TTL_SECONDS, nx=True)
+                await pipe.execute()
+            except Exception as e:
+                app_logger.warning(f"Game status cache batch write failed: {str(e)}")
+            
+            for igdb_id in missing_ids:
+                availability[igdb_id] = igdb_id in available_ids
+        
+        return availability
     
     @staticmethod
     async def get_game_request_status(igdb_id: int, user_id: Optional[int] = None) -> dict:
         """Comprehensive status check for a game"""
+        cache_field = f"status:{user_id or 0}"
+        cached = await RequestService._get_cached_game_status(igdb_id, cache_field)
+        if cached is not None:
+            return orjson.loads(cached)
+        
+        active_statuses = [RequestStatus.PENDING, RequestStatus.APPROVED]
+        # One aggregate over the game's requests answers all three questions
+        columns = [
+            # Is the game available (completed request exists)
+            func.max(case((GameRequestDB.status == RequestStatus.COMPLETED, 1), else_=0)),
+            # Does ANY user have a pending/approved request
+            func.max(case((GameRequestDB.status.in_(active_statuses), 1), else_=0)),
+        ]
+        if user_id:
+            # Status of the user's own pending/approved request for this game
+            columns.append(func.max(case((
+                and_(GameRequestDB.requester_id == user_id, GameRequestDB.status.in_(active_statuses)),
+                GameRequestDB.status
+            ))))
+        
         async with AsyncSessionLocal() as session:
-            # Check if game is available (completed request exists)
-            available_query = select(GameRequestDB).where(
-                GameRequestDB.igdb_id == igdb_id,
-                GameRequestDB.status == RequestStatus.COMPLETED
-            )
-            available_result = await session.execute(available_query)
-            is_available = available_result.first() is not None
-            
-            # Check if user has pending/approved request for this game
-            user_request = None
-            if user_id:
-                user_query = select(GameRequestDB).where(
-                    GameRequestDB.igdb_id == igdb_id,
-                    GameRequestDB.requester_id == user_id,
-                    GameRequestDB.status.in_([RequestStatus.PENDING, RequestStatus.APPROVED])
-                )
-                user_result = await session.execute(user_query)
-                user_request = user_result.scalar_one_or_none()
-            
-            # Check if ANY user has pending/approved request
-            any_pending_query = select(GameRequestDB).where(
-                GameRequestDB.igdb_id == igdb_id,
-                GameRequestDB.status.in_([RequestStatus.PENDING, RequestStatus.APPROVED])
+            result = await session.execute(
+                select(*columns).where(GameRequestDB.igdb_id == igdb_id)
             )
-            any_pending_result = await session.execute(any_pending_query)
-            has_pending_request = any_pending_result.first() is not None
-            
-            return {
-                "is_available": is_available,
-                "user_has_request": user_request is not None,
-                "user_request_status": user_request.status if user_request else None,
-                "has_pending_request": has_pending_request,
-                "can_request": not is_available and not has_pending_request
-            }
+            row = result.one()
+        
+        is_available = bool(row[0])
+        has_pending_request = bool(row[1])
+        user_request_status = row[2] if user_id else None
+        
+        status = {
+            "is_available": is_available,
+            "user_has_request": user_request_status is not None,
+            "user_request_status": user_request_status.value if user_request_status else None,
+            "has_pending_request": has_pending_request,
+            "can_request": not is_available and not has_pending_request
+        }
+        
+        await RequestService._set_cached_game_status(igdb_id, cache_field, orjson.dumps(status))
+        return status
     
     @staticmethod
     async def update_request_status(
@@ -282,20 +380,18 @@ class RequestService:
     ) -> Optional[GameRequestDB]:
         """Update only the status of a request"""
         async with AsyncSessionLocal() as session:
-            # Get request with requester info
-            query = select(GameRequestDB).options(selectinload(GameRequestDB.requester)).where(GameRequestDB.id == request_id)
-            result = await session.execute(query)
-            db_request = result.scalar_one_or_none()
+            # Get request by primary key, requester is loaded with it (selectin)
+            db_request = await session.get(GameRequestDB, request_id)
             
             if not db_request:
                 return None
             
             old_status = db_request.status
             
-            # Update status
+            # Update status, updated_at comes back with the UPDATE (eager_defaults)
             db_request.status = new_status
             await session.commit()
-            await session.refresh(db_request)
+            await RequestService.invalidate_game_status_cache(db_request.igdb_id)
             
             # Log status change
             app_logger.audit(
@@ -308,22 +404,9 @@ class RequestService:
             if old_status != new_status:
                 try:
                     # Create GameRequest object for notification
-                    from models.request import GameRequest
-                    request_for_notification = GameRequest(
-                        id=db_request.id,
-                        game_name=db_request.game_name,
-                        igdb_id=db_request.igdb_id,
-                        igdb_cover_url=db_request.igdb_cover_url,
-                        igdb_genres=db_request.igdb_genres,
-                        comment=db_request.comment,
-                        status=db_request.status,
-                        admin_notes=db_request.admin_notes,
-                        created_at=db_request.created_at,
-                        updated_at=db_request.updated_at,
-                        requester_id=db_request.requester_id
-                    )
+                    request_for_notification = GameRequest.model_validate(db_request)
                     
-                    await telegram_service.notify_status_change(
+                    telegram_service.send_status_change_in_background(
                         request_for_notification,
                         old_status,
                         db_request.requester.username if db_request.requester else 'Unbekannt',
@@ -1,16 +1,60 @@
-from sqlalchemy import select
+from sqlalchemy import bindparam, func, select
 from sqlalchemy.exc import NoResultFound
-from models.database import AsyncSessionLocal, SystemSettingsDB
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.database import AsyncSessionLocal, GameRequestDB, RequestStatus, SystemSettingsDB, UserDB, UserRole
 from models.settings_models import SystemSettings
 from services.logging_service import app_logger
+from typing import Optional
 import httpx
 import asyncio
 
+# Settings only change through update_settings, so one copy per process is kept
+_cached_settings: Optional[SystemSettings] = None
+_settings_lock = asyncio.Lock()
+
+# SystemSettings field -> SystemSettingsDB column, taken from the snake_case validation aliases
+_SETTINGS_COLUMNS = {
+    name: field.validation_alias.choices[-1]
+    for name, field in SystemSettings.model_fields.items()
+}
+
+# Role and active request count of a user in one query, built once at import
+_USER_ROLE_AND_ACTIVE_REQUESTS = select(
+    UserDB.role,
+    select(func.count(GameRequestDB.id))
+    .where(
+        GameRequestDB.requester_id == UserDB.id,
+        GameRequestDB.status.in_([RequestStatus.PENDING, RequestStatus.APPROVED])
+    )
+    .scalar_subquery()
+).where(UserDB.id == bindparam("user_id"))
+
+# One long-lived client so Telegram calls reuse the TLS connection instead of reconnecting each time
+_telegram_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    timeout=httpx.Timeout(10.0)
+)
+
+async def close_telegram_client() -> None:
+    await _telegram_client.aclose()
+
 class SettingsService:
     
     @staticmethod
     async def get_settings() -> SystemSettings:
         """Get system settings, create default if not exists"""
+        global _cached_settings
+        if _cached_settings is not None:
+            return _cached_settings
+        async with _settings_lock:
+            if _cached_settings is None:
+                _cached_settings = await SettingsService._load_settings()
+            return _cached_settings
+    
+    @staticmethod
+    async def _load_settings() -> SystemSettings:
+        """Read system settings from the database, create default if not exists"""
         async with AsyncSessionLocal() as session:
             try:
                 result = await session.execute(
@@ -19,23 +63,7 @@ class SettingsService:
                 settings_db = result.scalar_one()
                 
                 # Convert DB model to Pydantic model
-                settings = SystemSettings(
-                    maxRequestsPerUser=settings_db.max_requests_per_user,
-                    requireAdminApproval=settings_db.require_admin_approval,
-                    allowUserRequestDeletion=settings_db.allow_user_request_deletion,
-                    telegramEnabled=settings_db.telegram_enabled,
-                    telegramBotToken=settings_db.telegram_bot_token,
-                    telegramChatId=settings_db.telegram_chat_id,
-                    notifyOnNewRequest=settings_db.notify_on_new_request,
-                    notifyOnStatusChange=settings_db.notify_on_status_change,
-                    notifyOnUserRegistration=settings_db.notify_on_user_registration,
-                    notifyOnSystemErrors=settings_db.notify_on_system_errors,
-                    enableApplicationLogs=settings_db.enable_application_logs,
-                    enableErrorLogs=settings_db.enable_error_logs,
-                    enableAuditLogs=settings_db.enable_audit_logs,
-                    logRetentionDays=settings_db.log_retention_days,
-                    logLevel=settings_db.log_level
-                )
+                settings = SystemSettings.model_validate(settings_db)
                 app_logger.apply_settings(settings)
                 return settings
                 
@@ -44,7 +72,6 @@ class SettingsService:
                 default_settings = SystemSettingsDB(id=1)
                 session.add(default_settings)
                 await session.commit()
-                await session.refresh(default_settings)
                 
                 settings = SystemSettings()
                 app_logger.apply_settings(settings)
@@ -53,6 +80,7 @@ class SettingsService:
     @staticmethod
     async def update_settings(settings: SystemSettings) -> SystemSettings:
         """Update system settings"""
+        global _cached_settings
         async with AsyncSessionLocal() as session:
             try:
                 result = await session.execute(
@@ -66,62 +94,42 @@ class SettingsService:
                 session.add(settings_db)
             
             # Update all fields
-            settings_db.max_requests_per_user = settings.maxRequestsPerUser
-            settings_db.require_admin_approval = settings.requireAdminApproval
-            settings_db.allow_user_request_deletion = settings.allowUserRequestDeletion
-            settings_db.telegram_enabled = settings.telegramEnabled
-            settings_db.telegram_bot_token = settings.telegramBotToken
-            settings_db.telegram_chat_id = settings.telegramChatId
-            settings_db.notify_on_new_request = settings.notifyOnNewRequest
-            settings_db.notify_on_status_change = settings.notifyOnStatusChange
-            settings_db.notify_on_user_registration = settings.notifyOnUserRegistration
-            settings_db.notify_on_system_errors = settings.notifyOnSystemErrors
-            settings_db.enable_application_logs = settings.enableApplicationLogs
-            settings_db.enable_error_logs = settings.enableErrorLogs
-            settings_db.enable_audit_logs = settings.enableAuditLogs
-            settings_db.log_retention_days = settings.logRetentionDays
-            settings_db.log_level = settings.logLevel
+            for field, column in _SETTINGS_COLUMNS.items():
+                setattr(settings_db, column, getattr(settings, field))
             
             await session.commit()
-            await session.refresh(settings_db)
 
             # Apply logging settings immediately
             app_logger.apply_settings(settings)
+            _cached_settings = settings
             
             return settings
     
     @staticmethod
-    async def can_user_create_request(user_id: int) -> bool:
-        """Check if user can create a new request based on settings (admins are unlimited)"""
-        # Check if user is admin first
-        from models.database import UserDB, UserRole
-        async with AsyncSessionLocal() as session:
-            user_result = await session.execute(
-                select(UserDB).where(UserDB.id == user_id)
-            )
-            user = user_result.scalar_one_or_none()
-            
-            # Admins have unlimited requests
-            if user and user.role == UserRole.ADMIN:
-                return True
+    async def can_user_create_request(user_id: int, session: Optional[AsyncSession] = None) -> bool:
+        """Check if user can create a new request based on settings (admins are unlimited)
+        
+        Runs on the caller's session if given, otherwise on a new one.
+        """
+        params = {"user_id": user_id}
+        if session is not None:
+            row = (await session.execute(_USER_ROLE_AND_ACTIVE_REQUESTS, params)).first()
+        else:
+            async with AsyncSessionLocal() as session:
+                row = (await session.execute(_USER_ROLE_AND_ACTIVE_REQUESTS, params)).first()
+        
+        role, active_count = row if row is not None else (None, 0)
+        
+        # Admins have unlimited requests
+        if role == UserRole.ADMIN:
+            return True
         
         settings = await SettingsService.get_settings()
         
         if settings.maxRequestsPerUser == -1:  # Unlimited for regular users
             return True
         
-        # Count active requests for regular user
-        from models.database import GameRequestDB, RequestStatus
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(GameRequestDB).where(
-                    GameRequestDB.requester_id == user_id,
-                    GameRequestDB.status.in_([RequestStatus.PENDING, RequestStatus.APPROVED])
-                )
-            )
-            active_requests = result.scalars().all()
-            
-            return len(active_requests) < settings.maxRequestsPerUser
+        return active_count < settings.maxRequestsPerUser
     
     @staticmethod
     async def test_telegram_connection(bot_token: str, chat_id: str) -> bool:
@@ -134,16 +142,15 @@ class SettingsService:
                 "parse_mode": "HTML"
             }
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, json=payload)
+            response = await _telegram_client.post(url, json=payload)
+            
+            if response.status_code == 200:
+                data = response.json()
+                return data.get("ok", False)
+            else:
+                app_logger.error(f"Telegram API error: {response.status_code} - {response.text}")
+                return False
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("ok", False)
-                else:
-                    app_logger.error(f"Telegram API error: {response.status_code} - {response.text}")
-                    return False
-                    
         except httpx.TimeoutException:
             app_logger.error("Telegram API timeout")
             return False
@@ -190,10 +197,9 @@ class SettingsService:
                 "parse_mode": "HTML"
             }
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, json=payload)
-                return response.status_code == 200
-                
+            response = await _telegram_client.post(url, json=payload)
+            return response.status_code == 200
+            
         except Exception as e:
             app_logger.error(f"Failed to send Telegram notification: {str(e)}")
             return False
@@ -1,22 +1,37 @@
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, exists
 from models.database import AsyncSessionLocal, UserDB, UserRole
+from services.logging_service import app_logger
+
+# Once an admin exists setup stays completed, so later checks skip the database.
+# Reset whenever admins may have been removed.
+_setup_completed = False
 
 class SetupService:
     
+    @staticmethod
+    def invalidate_setup_status():
+        """Forget the cached setup state after admins were removed or demoted"""
+        global _setup_completed
+        _setup_completed = False
+    
     @staticmethod
     async def needs_setup() -> bool:
         """Check if initial admin setup is needed"""
+        global _setup_completed
+        if _setup_completed:
+            return False
+        
         async with AsyncSessionLocal() as session:
             try:
                 result = await session.execute(
-                    select(UserDB).where(UserDB.role == UserRole.ADMIN.value)
+                    select(exists().where(UserDB.role == UserRole.ADMIN.value))
                 )
-                admin_exists = result.first()
-                return admin_exists is None
+                _setup_completed = bool(result.scalar())
+                return not _setup_completed
             except Exception as e:
-                print(f"Error checking setup status: {e}")
-                # On error, allow setup
-                return True
+                app_logger.error(f"Error checking setup status: {str(e)}")
+                # A failed check must not look like "no admin yet" and open admin creation
+                raise
     
     @staticmethod
     async def reset_setup():
@@ -27,9 +42,10 @@ class SetupService:
                     delete(UserDB).where(UserDB.role == UserRole.ADMIN.value)
                 )
                 await session.commit()
+                SetupService.invalidate_setup_status()
                 return result.rowcount
             except Exception as e:
-                print(f"Error resetting setup: {e}")
+                app_logger.error(f"Error resetting setup: {str(e)}")
                 await session.rollback()
                 return 0
     
@@ -43,5 +59,5 @@ class SetupService:
                 )
                 return result.scalars().all()
             except Exception as e:
-                print(f"Error getting admin users: {e}")
+                app_logger.error(f"Error getting admin users: {str(e)}")
                 return []
\ No newline at end of file
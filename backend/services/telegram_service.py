@@ -4,31 +4,201 @@ Telegram Notification Service
 Handles sending notifications to Telegram channels with game information and cover images.
 """
 import asyncio
+import contextlib
 import logging
-from typing import Optional, Dict, Any
+import time
+from datetime import datetime
+from typing import Coroutine, NamedTuple, Optional, Dict, Any
 import aiohttp
+import orjson
 from services.settings_service import SettingsService
+from services.logging_service import app_logger
 from models.request import GameRequest, RequestStatus
+from models.settings_models import SystemSettings
 
 logger = logging.getLogger(__name__)
 
+# Rate limited (429) messages are retried after Telegram's retry_after
+TELEGRAM_MAX_ATTEMPTS = 3
+# Notifications waiting to be sent, further ones are dropped
+NOTIFICATION_QUEUE_SIZE = 1000
+# Queued notifications the worker takes at once
+NOTIFICATION_BATCH_SIZE = 8
+# Minimum gap between two messages to the same chat
+TELEGRAM_CHAT_INTERVAL_SECONDS = 1.0
+
+# User supplied text is escaped for Telegram's HTML parse mode in a single pass
+_HTML_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+def _escape(text: str) -> str:
+    return text.translate(_HTML_ESCAPE_TABLE)
+
+def _format_time(dt: datetime) -> str:
+    """dd.mm.yyyy HH:MM, built from the fields instead of strftime"""
+    return f"{dt.day:02d}.{dt.month:02d}.{dt.year} {dt.hour:02d}:{dt.minute:02d}"
+
+def _orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+class _StatusChange(NamedTuple):
+    """A queued status change, merged with later ones of the same request"""
+    request: GameRequest
+    old_status: RequestStatus
+    requester_username: str
+    admin_username: Optional[str]
+
+_STATUS_EMOJI = {
+    RequestStatus.PENDING: "⏳",
+    RequestStatus.APPROVED: "✅",
+    RequestStatus.REJECTED: "❌",
+    RequestStatus.COMPLETED: "🎉"
+}
+
+_STATUS_TEXT = {
+    RequestStatus.PENDING: "Pending",
+    RequestStatus.APPROVED: "Approved",
+    RequestStatus.REJECTED: "Rejected",
+    RequestStatus.COMPLETED: "Completed"
+}
+
 class TelegramService:
+    """Sends Telegram notifications
+    
+    Request handlers don't await notify_* directly, they pass the coroutine to
+    send_in_background (status changes go through send_status_change_in_background)
+    so the response doesn't wait for Telegram.
+    """
+    
     def __init__(self):
         self.settings_service = SettingsService()
+        # Notifications are sent by one worker task, started with the first one queued
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=NOTIFICATION_QUEUE_SIZE)
+        self._worker: Optional[asyncio.Task] = None
+        # Bursts of notifications are sent one after another instead of racing into the rate limit
+        self._send_lock = asyncio.Lock()
+        # When the last message went to each chat
+        self._last_send: Dict[str, float] = {}
+        # Settings the Telegram configuration was last read from, and that configuration
+        self._config: Optional[tuple[SystemSettings, tuple[str, str, bool]]] = None
+        # Created on first use, inside the running event loop
+        self._session: Optional[aiohttp.ClientSession] = None
     
-    async def _get_telegram_config(self) -> tuple[str, str, bool]:
-        """Get Telegram configuration from settings"""
-        settings = await self.settings_service.get_settings()
-        return (
-            settings.telegramBotToken,
-            settings.telegramChatId,
-            settings.telegramEnabled
-        )
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared session so Telegram calls reuse keep-alive connections"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, limit_per_host=10, ttl_dns_cache=300, keepalive_timeout=75),
+                timeout=aiohttp.ClientTimeout(total=10),
+                # Messages are posted as JSON, orjson encodes them in C
+                json_serialize=_orjson_dumps
+            )
+        return self._session
+    
+    async def aclose(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._worker
+        while not self._queue.empty():
+            request_id, notification, _ = self._queue.get_nowait()
+            if request_id is None:
+                notification.close()
+        if self._session is not None:
+            await self._session.close()
+    
+    def send_in_background(self, notification: Coroutine[Any, Any, bool], description: str) -> None:
+        """Queue a notification for the worker, the caller doesn't wait for Telegram"""
+        self._enqueue(None, notification, description)
+    
+    def send_status_change_in_background(
+        self,
+        request: GameRequest,
+        old_status: RequestStatus,
+        requester_username: str,
+        admin_username: Optional[str] = None
+    ) -> None:
+        """Queue a status change notification
+        
+        Changes of one request queued together are sent as one message,
+        from the first old status to the latest status.
+        """
+        change = _StatusChange(request, old_status, requester_username, admin_username)
+        self._enqueue(request.id, change, "status change")
     
-    async def _send_message(self, text: str, photo_url: Optional[str] = None) -> bool:
+    def _enqueue(self, request_id: Optional[int], notification: Any, description: str) -> None:
+        try:
+            self._queue.put_nowait((request_id, notification, description))
+        except asyncio.QueueFull:
+            if request_id is None:
+                notification.close()
+            app_logger.warning(f"Telegram notification queue full, dropped notification for {description}")
+            return
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run_worker(), name="telegram-notifications")
+    
+    async def _run_worker(self) -> None:
+        """Send queued notifications in batches, merging status changes of the same request"""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < NOTIFICATION_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            first_change: Dict[int, _StatusChange] = {}
+            latest = {}
+            for index, (request_id, notification, _) in enumerate(batch):
+                if request_id is not None:
+                    first_change.setdefault(request_id, notification)
+                    latest[request_id] = index
+            try:
+                for index, (request_id, notification, description) in enumerate(batch):
+                    if request_id is not None:
+                        if latest[request_id] != index:
+                            continue
+                        old_status = first_change[request_id].old_status
+                        if old_status == notification.request.status:
+                            # The changes cancelled each other out
+                            continue
+                        notification = self.notify_status_change(
+                            notification.request, old_status,
+                            notification.requester_username, notification.admin_username
+                        )
+                    try:
+                        await notification
+                    except Exception as e:
+                        app_logger.error(f"Failed to send Telegram notification for {description}: {str(e)}", exc_info=e)
+            finally:
+                # The rest of the batch on shutdown is never awaited
+                for request_id, notification, _ in batch:
+                    if request_id is None:
+                        notification.close()
+    
+    @staticmethod
+    def _is_configured(settings: SystemSettings) -> bool:
+        """Whether messages can be sent at all, checked before building them"""
+        return bool(settings.telegramEnabled and settings.telegramBotToken and settings.telegramChatId)
+    
+    async def _get_telegram_config(self, settings: Optional[SystemSettings] = None) -> tuple[str, str, bool]:
+        """Get Telegram configuration from settings, loaded unless the caller has them"""
+        if settings is None:
+            settings = await self.settings_service.get_settings()
+        # The cached settings object is only replaced when settings are updated
+        if self._config is None or self._config[0] is not settings:
+            self._config = (settings, (
+                settings.telegramBotToken,
+                settings.telegramChatId,
+                settings.telegramEnabled
+            ))
+        return self._config[1]
+    
+    async def _send_message(
+        self,
+        text: str,
+        photo_url: Optional[str] = None,
+        settings: Optional[SystemSettings] = None
+    ) -> bool:
         """Send message to Telegram channel"""
         try:
-            bot_token, chat_id, enabled = await self._get_telegram_config()
+            bot_token, chat_id, enabled = await self._get_telegram_config(settings)
             
             if not enabled or not bot_token or not chat_id:
                 logger.info("Telegram notifications disabled or not configured")
@@ -36,38 +206,59 @@ class TelegramService:
             
             url = f"https://api.telegram.org/bot{bot_token}/"
             
-            async with aiohttp.ClientSession() as session:
-                if photo_url:
-                    # Send photo with caption
-                    endpoint = url + "sendPhoto"
-                    data = {
-                        'chat_id': chat_id,
-                        'photo': photo_url,
-                        'caption': text,
-                        'parse_mode': 'HTML'
-                    }
-                else:
-                    # Send text message
-                    endpoint = url + "sendMessage"
-                    data = {
-                        'chat_id': chat_id,
-                        'text': text,
-                        'parse_mode': 'HTML'
-                    }
-                
-                async with session.post(endpoint, data=data) as response:
-                    if response.status == 200:
-                        logger.info("Telegram message sent successfully")
-                        return True
-                    else:
+            session = self._get_session()
+            if photo_url:
+                # Send photo with caption
+                endpoint = url + "sendPhoto"
+                data = {
+                    'chat_id': chat_id,
+                    'photo': photo_url,
+                    'caption': text,
+                    'parse_mode': 'HTML'
+                }
+            else:
+                # Send text message
+                endpoint = url + "sendMessage"
+                data = {
+                    'chat_id': chat_id,
+                    'text': text,
+                    'parse_mode': 'HTML'
+                }
+            
+            async with self._send_lock:
+                for attempt in range(1, TELEGRAM_MAX_ATTEMPTS + 1):
+                    # Telegram allows about one message per second to the same chat
+                    wait = self._last_send.get(chat_id, 0.0) + TELEGRAM_CHAT_INTERVAL_SECONDS - time.monotonic()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    self._last_send[chat_id] = time.monotonic()
+                    
+                    async with session.post(endpoint, json=data) as response:
+                        if response.status == 200:
+                            logger.info("Telegram message sent successfully")
+                            return True
                         error_text = await response.text()
-                        logger.error(f"Failed to send Telegram message: {response.status} - {error_text}")
-                        return False
-                        
+                        if response.status == 429 and attempt < TELEGRAM_MAX_ATTEMPTS:
+                            retry_after = self._get_retry_after(error_text, attempt)
+                            logger.warning(f"Telegram rate limit hit, retrying in {retry_after}s")
+                        else:
+                            logger.error(f"Failed to send Telegram message: {response.status} - {error_text}")
+                            return False
+                    await asyncio.sleep(retry_after)
+                    
         except Exception as e:
             logger.error(f"Error sending Telegram message: {e}")
             return False
     
+    @staticmethod
+    def _get_retry_after(error_text: str, attempt: int) -> int:
+        """Seconds to wait from a 429 response body, backing off exponentially if Telegram didn't say"""
+        backoff = 2 ** attempt
+        try:
+            return int(orjson.loads(error_text).get("parameters", {}).get("retry_after", backoff))
+        except (ValueError, TypeError, AttributeError):
+            return backoff
+    
     async def send_test_message(self, bot_token: str, chat_id: str) -> bool:
         """Send a test message to verify Telegram configuration"""
         try:
@@ -78,16 +269,16 @@ class TelegramService:
                 'parse_mode': 'HTML'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, data=data) as response:
-                    if response.status == 200:
-                        logger.info("Telegram test message sent successfully")
-                        return True
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to send Telegram test message: {response.status} - {error_text}")
-                        return False
-                        
+            session = self._get_session()
+            async with session.post(url, json=data) as response:
+                if response.status == 200:
+                    logger.info("Telegram test message sent successfully")
+                    return True
+                else:
+                    error_text = await response.text()
+                    logger.error(f"Failed to send Telegram test message: {response.status} - {error_text}")
+                    return False
+                    
         except Exception as e:
             logger.error(f"Error sending Telegram test message: {e}")
             return False
@@ -95,86 +286,81 @@ class TelegramService:
     async def notify_new_request(self, request: GameRequest, requester_username: str) -> bool:
         """Send notification for new game request"""
         settings = await self.settings_service.get_settings()
-        if not settings.notifyOnNewRequest:
+        if not self._is_configured(settings) or not settings.notifyOnNewRequest:
             return False
         
         # Build message
         status_emoji = "📝"
-        message = f"{status_emoji} <b>New Game Request</b>\n\n"
-        message += f"🎮 <b>Game:</b> {request.game_name}\n"
-        message += f"👤 <b>Requested by:</b> {requester_username}\n"
-        message += f"🆔 <b>Request ID:</b> #{request.id}\n"
+        parts = [
+            f"{status_emoji} <b>New Game Request</b>\n\n",
+            f"🎮 <b>Game:</b> {_escape(request.game_name)}\n",
+            f"👤 <b>Requested by:</b> {_escape(requester_username)}\n",
+            f"🆔 <b>Request ID:</b> #{request.id}\n",
+        ]
         
         if request.comment:
-            message += f"💬 <b>Comment:</b> {request.comment}\n"
+            parts.append(f"💬 <b>Comment:</b> {_escape(request.comment)}\n")
         
         if request.igdb_genres:
-            message += f"🎯 <b>Genres:</b> {request.igdb_genres}\n"
+            parts.append(f"🎯 <b>Genres:</b> {_escape(request.igdb_genres)}\n")
         
-        message += f"📅 <b>Created:</b> {request.created_at.strftime('%d.%m.%Y %H:%M')}\n"
-        message += f"⚡ <b>Status:</b> {self._get_status_text(request.status)}"
+        parts.append(f"📅 <b>Created:</b> {_format_time(request.created_at)}\n")
+        parts.append(f"⚡ <b>Status:</b> {self._get_status_text(request.status)}")
+        message = "".join(parts)
         
-        return await self._send_message(message, request.igdb_cover_url)
+        return await self._send_message(message, request.igdb_cover_url, settings)
     
     async def notify_status_change(self, request: GameRequest, old_status: RequestStatus, 
                                  requester_username: str, admin_username: Optional[str] = None) -> bool:
         """Send notification for request status change"""
         settings = await self.settings_service.get_settings()
-        if not settings.notifyOnStatusChange:
+        if not self._is_configured(settings) or not settings.notifyOnStatusChange:
             return False
         
         # Build message
         status_emoji = self._get_status_emoji(request.status)
-        message = f"{status_emoji} <b>Status Change</b>\n\n"
-        message += f"🎮 <b>Game:</b> {request.game_name}\n"
-        message += f"👤 <b>Requested by:</b> {requester_username}\n"
-        message += f"🆔 <b>Request ID:</b> #{request.id}\n"
-        message += f"📊 <b>Status:</b> {self._get_status_text(old_status)} → {self._get_status_text(request.status)}\n"
+        parts = [
+            f"{status_emoji} <b>Status Change</b>\n\n",
+            f"🎮 <b>Game:</b> {_escape(request.game_name)}\n",
+            f"👤 <b>Requested by:</b> {_escape(requester_username)}\n",
+            f"🆔 <b>Request ID:</b> #{request.id}\n",
+            f"📊 <b>Status:</b> {self._get_status_text(old_status)} → {self._get_status_text(request.status)}\n",
+        ]
         
         if admin_username:
-            message += f"👨‍💼 <b>Processed by:</b> {admin_username}\n"
+            parts.append(f"👨‍💼 <b>Processed by:</b> {_escape(admin_username)}\n")
         
         if request.admin_notes:
-            message += f"📝 <b>Admin Notes:</b> {request.admin_notes}\n"
+            parts.append(f"📝 <b>Admin Notes:</b> {_escape(request.admin_notes)}\n")
         
-        message += f"📅 <b>Updated:</b> {request.updated_at.strftime('%d.%m.%Y %H:%M')}"
+        parts.append(f"📅 <b>Updated:</b> {_format_time(request.updated_at)}")
+        message = "".join(parts)
         
-        return await self._send_message(message, request.igdb_cover_url)
+        return await self._send_message(message, request.igdb_cover_url, settings)
     
     async def notify_user_registration(self, username: str) -> bool:
         """Send notification for new user registration"""
         settings = await self.settings_service.get_settings()
-        if not settings.notifyOnUserRegistration:
+        if not self._is_configured(settings) or not settings.notifyOnUserRegistration:
             return False
         
-        from datetime import datetime
-        now = datetime.now()
-        
-        message = f"👤 <b>New User Registration</b>\n\n"
-        message += f"🆔 <b>Username:</b> {username}\n"
-        message += f"📅 <b>Registered:</b> {now.strftime('%d.%m.%Y %H:%M')}"
+        message = (
+            f"👤 <b>New User Registration</b>\n\n"
+            f"🆔 <b>Username:</b> {_escape(username)}\n"
+            f"📅 <b>Registered:</b> {_format_time(datetime.now())}"
+        )
         
-        return await self._send_message(message)
+        return await self._send_message(message, settings=settings)
     
-    def _get_status_emoji(self, status: RequestStatus) -> str:
+    @staticmethod
+    def _get_status_emoji(status: RequestStatus) -> str:
         """Get emoji for request status"""
-        emoji_map = {
-            RequestStatus.PENDING: "⏳",
-            RequestStatus.APPROVED: "✅", 
-            RequestStatus.REJECTED: "❌",
-            RequestStatus.COMPLETED: "🎉"
-        }
-        return emoji_map.get(status, "📋")
-    
-    def _get_status_text(self, status: RequestStatus) -> str:
+        return _STATUS_EMOJI.get(status, "📋")
+    
+    @staticmethod
+    def _get_status_text(status: RequestStatus) -> str:
         """Get text for request status"""
-        status_map = {
-            RequestStatus.PENDING: "Pending",
-            RequestStatus.APPROVED: "Approved",
-            RequestStatus.REJECTED: "Rejected", 
-            RequestStatus.COMPLETED: "Completed"
-        }
-        return status_map.get(status, str(status))
+        return _STATUS_TEXT.get(status, str(status))
 
 
 # Global instance
@@ -1,22 +1,48 @@
 from backend.models.request import StoredGameRequest
-from typing import List
+from collections import deque
+from typing import Deque, Dict, List
+import threading
 
-_requests: List[StoredGameRequest] = []
+# Stored requests beyond this are evicted, least recently added first
+MAX_REQUESTS = 10_000
+
+# Stored requests, oldest first; a slug can be requested more than once
+_requests: Deque[StoredGameRequest] = deque()
+# The same requests by slug, for the slug lookups
+_requests_by_slug: Dict[str, List[StoredGameRequest]] = {}
+# The store is shared by all handlers
+_lock = threading.RLock()
+
+def _evict():
+    while len(_requests) > MAX_REQUESTS:
+        oldest = _requests.popleft()
+        same_slug = _requests_by_slug[oldest.slug]
+        same_slug.pop(0)
+        if not same_slug:
+            del _requests_by_slug[oldest.slug]
 
 def add_request(req: StoredGameRequest):
-    _requests.append(req)
+    with _lock:
+        _requests.append(req)
+        _requests_by_slug.setdefault(req.slug, []).append(req)
+        _evict()
 
 def get_requests() -> List[StoredGameRequest]:
-    return _requests
+    with _lock:
+        return list(_requests)
 
 def exists(slug: str) -> bool:
-    return any(r.slug == slug for r in _requests)
+    with _lock:
+        return slug in _requests_by_slug
 
 def clear_requests():
-    _requests.clear()
+    with _lock:
+        _requests.clear()
+        _requests_by_slug.clear()
 
 def fulfill_matching_requests(library_slugs: list[str]):
-    for request in _requests:
-        if request.slug in library_slugs:
-            request.status = "fulfilled"
-
+    library_slugs = set(library_slugs)
+    with _lock:
+        for slug in _requests_by_slug.keys() & library_slugs:
+            for request in _requests_by_slug[slug]:
+                request.status = "fulfilled"